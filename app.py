@@ -1,14 +1,24 @@
-import altair as alt
+import functools
+
 import streamlit as st
-from datetime import date, time
+from datetime import date, datetime, time, timedelta
+from time import perf_counter
 
-from core.charts import (
-    make_basic_line_chart,
-    make_dynamic_line_chart,
-    make_liquids_chart,
+from core import profiling
+from core.db import (
+    DEFAULT_JOURNAL_NAME,
+    JOURNAL_NAME_MAX,
+    data_version,
+    date_bounds,
+    init_db,
+    journal_id_for,
+    load_all_cached,
+    load_entry,
+    load_range,
+    load_rollup,
+    upsert_entry,
+    valid_journal_name,
 )
-from core.db import init_db, load_all, load_entry, upsert_entry
-from core.import_export import import_csv_to_db
 from core.utils import compute_sleep_hours, day_name_for_language
 
 LANGUAGES = [
@@ -24,7 +34,21 @@ LANGUAGE_LABELS = {
 LANGUAGE_NAME_MAP = {code: name for code, name in LANGUAGES}
 LANGUAGE_WIDGET_KEY = "language_selector"
 THEME_WIDGET_KEY = "theme_selector"
-ALT_DARK_THEME_NAME = "bt_dark_theme"
+TABS_WIDGET_KEY = "main_tabs"
+OPEN_TAB_KEY = "open_tab_section"
+TAB_DEFAULT_KEY = "tab_default"
+TAB_SECTIONS = ("entry_tab", "graphs_tab", "history_tab")
+TIMINGS_WIDGET_KEY = "timings_toggle"
+APP_RUN_KEY = "app_run_count"
+FRAGMENT_RUNS_KEY = "fragment_last_app_run"
+FLASH_KEY = "flash_message"
+IMPORTED_UPLOAD_KEY = "imported_upload_id"
+IMPORT_JOB_KEY = "import_job_id"
+IMPORT_POLL_SECONDS = 0.5
+JOURNAL_QUERY_PARAM = "journal"
+PROFILE_WIDGET_KEY = "profile_toggle"
+PROFILE_REPORTS_KEY = "profile_reports"
+PROFILE_HISTORY = 20
 
 TRANSLATIONS = {
     "app_title": {
@@ -151,6 +175,16 @@ TRANSLATIONS = {
         "nl": "Gegevens opgeslagen ✅",
     },
     "graphs_subheader": {"en": "Charts", "fr": "Graphiques", "nl": "Grafieken"},
+    "date_range_label": {
+        "en": "Period",
+        "fr": "Période",
+        "nl": "Periode",
+    },
+    "granularity_label": {
+        "en": "Granularity",
+        "fr": "Granularité",
+        "nl": "Granulariteit",
+    },
     "no_data_info": {
         "en": "No data recorded yet.",
         "fr": "Pas encore de données enregistrées.",
@@ -232,9 +266,14 @@ TRANSLATIONS = {
         "nl": "Nog geen gegevens geregistreerd, niets om te exporteren.",
     },
     "export_button": {
-        "en": "📥 Export data to CSV",
-        "fr": "📥 Exporter les données en CSV",
-        "nl": "📥 Gegevens exporteren naar CSV",
+        "en": "📥 Export data",
+        "fr": "📥 Exporter les données",
+        "nl": "📥 Gegevens exporteren",
+    },
+    "export_format": {
+        "en": "Format",
+        "fr": "Format",
+        "nl": "Formaat",
     },
     "import_section": {
         "en": "Import from CSV (Excel or app export)",
@@ -262,28 +301,138 @@ TRANSLATIONS = {
         "nl": "Lopen (km)",
     },
     "import_label": {
-        "en": "Choose a CSV file to import",
-        "fr": "Choisis un fichier CSV à importer",
-        "nl": "Kies een CSV-bestand om te importeren",
+        "en": "Choose Excel workbooks or CSV files (or .zip archives of them) to import",
+        "fr": "Choisis des classeurs Excel ou des fichiers CSV (ou des archives .zip) à importer",
+        "nl": "Kies Excel-werkmappen of CSV-bestanden (of .zip-archieven ervan) om te importeren",
     },
     "import_help": {
-        "en": "Export your DB_DATA_SCADA sheet from Excel as CSV, then import it here.",
-        "fr": "Tu peux exporter ton onglet DB_DATA_SCADA en CSV depuis Excel, puis l'importer ici.",
-        "nl": "Exporteer je DB_DATA_SCADA-blad uit Excel naar CSV en importeer het hier.",
+        "en": "Upload your .xlsx workbook directly (its DB_DATA_SCADA sheet is read), "
+        "CSV exports of that sheet, or files exported from this app. "
+        "Several files are imported together; when they share a date, the last file wins.",
+        "fr": "Tu peux importer directement ton classeur .xlsx (l'onglet DB_DATA_SCADA est lu), "
+        "des exports CSV de cet onglet, ou des fichiers exportés depuis l'app. "
+        "Plusieurs fichiers sont importés ensemble ; pour une même date, le dernier fichier l'emporte.",
+        "nl": "Upload je .xlsx-werkmap rechtstreeks (het blad DB_DATA_SCADA wordt gelezen), "
+        "CSV-exports van dat blad, of bestanden die uit deze app zijn geëxporteerd. "
+        "Meerdere bestanden worden samen geïmporteerd; bij dezelfde datum wint het laatste bestand.",
     },
     "import_success": {
-        "en": "{rows} rows imported/updated successfully ✅",
-        "fr": "{rows} lignes importées / mises à jour avec succès ✅",
-        "nl": "{rows} rijen succesvol geimporteerd/bijgewerkt ✅",
+        "en": "Import done ✅ {inserted} new rows, {updated} updated, {unchanged} unchanged",
+        "fr": "Import terminé ✅ {inserted} nouvelles lignes, {updated} mises à jour, "
+        "{unchanged} inchangées",
+        "nl": "Import voltooid ✅ {inserted} nieuwe rijen, {updated} bijgewerkt, "
+        "{unchanged} ongewijzigd",
+    },
+    "import_progress": {
+        "en": "Importing… {parsed} rows read, {rows} rows written",
+        "fr": "Import en cours… {parsed} lignes lues, {rows} lignes écrites",
+        "nl": "Bezig met importeren… {parsed} rijen gelezen, {rows} rijen geschreven",
+    },
+    "import_queued": {
+        "en": "Import queued…",
+        "fr": "Import en attente…",
+        "nl": "Import in de wachtrij…",
+    },
+    "import_cancel": {
+        "en": "Cancel import",
+        "fr": "Annuler l'import",
+        "nl": "Import annuleren",
+    },
+    "import_cancelled": {
+        "en": "Import cancelled; {rows} rows were already saved.",
+        "fr": "Import annulé ; {rows} lignes étaient déjà enregistrées.",
+        "nl": "Import geannuleerd; {rows} rijen waren al opgeslagen.",
+    },
+    "import_duplicate": {
+        "en": "This file was already imported ({rows} rows).",
+        "fr": "Ce fichier a déjà été importé ({rows} lignes).",
+        "nl": "Dit bestand werd al geïmporteerd ({rows} rijen).",
     },
     "import_error": {
         "en": "Import error: {error}",
         "fr": "Erreur lors de l'import : {error}",
         "nl": "Importfout: {error}",
     },
+    "timings_toggle": {
+        "en": "Show render timings",
+        "fr": "Afficher les temps de rendu",
+        "nl": "Rendertijden tonen",
+    },
+    "timing_caption": {
+        "en": "⏱ {section}: {ms:.1f} ms ({scope})",
+        "fr": "⏱ {section} : {ms:.1f} ms ({scope})",
+        "nl": "⏱ {section}: {ms:.1f} ms ({scope})",
+    },
+    "timing_scope_app": {
+        "en": "full rerun",
+        "fr": "réexécution complète",
+        "nl": "volledige herrun",
+    },
+    "timing_scope_fragment": {
+        "en": "section only",
+        "fr": "section seule",
+        "nl": "alleen sectie",
+    },
+    "journal_caption": {
+        "en": "Journal: {name}",
+        "fr": "Journal : {name}",
+        "nl": "Dagboek: {name}",
+    },
+    "journal_missing": {
+        "en": "There is no journal called `{name}` yet.",
+        "fr": "Aucun journal ne s'appelle `{name}` pour l'instant.",
+        "nl": "Er is nog geen dagboek met de naam `{name}`.",
+    },
+    "journal_create": {
+        "en": "Create journal",
+        "fr": "Créer le journal",
+        "nl": "Dagboek aanmaken",
+    },
+    "journal_invalid": {
+        "en": "Journal names use up to {max} letters, digits, - or _.",
+        "fr": "Un nom de journal compte au plus {max} lettres, chiffres, - ou _.",
+        "nl": "Een dagboeknaam heeft hoogstens {max} letters, cijfers, - of _.",
+    },
+    "profile_toggle": {
+        "en": "Profile reruns",
+        "fr": "Profiler les réexécutions",
+        "nl": "Herruns profileren",
+    },
+    "profile_overlay": {
+        "en": "Performance",
+        "fr": "Performances",
+        "nl": "Prestaties",
+    },
+    "profile_total": {
+        "en": "{run}: {ms:.1f} ms in total",
+        "fr": "{run} : {ms:.1f} ms au total",
+        "nl": "{run}: {ms:.1f} ms in totaal",
+    },
+    "profile_recent": {
+        "en": "Recent runs",
+        "fr": "Exécutions récentes",
+        "nl": "Recente runs",
+    },
 }
 
 LIQUID_FIELDS = ["water_l", "beer_l", "wine_cl", "alcool_cl", "soda_l"]
+CHART_COLUMNS = ["weight", "sleep_hours", "nico", "run_km", *LIQUID_FIELDS]
+CHART_DEFAULT_DAYS = 365
+CHART_WIDTH_PX = 900
+
+# (column, adaptive y-domain, translation key prefix)
+CHART_PANELS = [
+    ("weight", True, "weight"),
+    ("sleep_hours", True, "sleep"),
+    ("nico", False, "nico"),
+    ("run_km", False, "run"),
+]
+
+GRANULARITY_LABELS = {
+    "day": {"en": "Day", "fr": "Jour", "nl": "Dag"},
+    "week": {"en": "Week", "fr": "Semaine", "nl": "Week"},
+    "month": {"en": "Month", "fr": "Mois", "nl": "Maand"},
+}
 
 LIQUID_LABELS = {
     "water_l": {"en": "Water (L)", "fr": "Eau (L)", "nl": "Water (L)"},
@@ -425,27 +574,6 @@ THEMES = {
 }
 
 
-def _altair_dark_theme():
-    return {
-        "config": {
-            "background": "#0f172a",
-            "view": {"fill": "#0f172a", "stroke": "transparent"},
-            "title": {"color": "#f8fafc"},
-            "axis": {
-                "labelColor": "#e2e8f0",
-                "titleColor": "#f8fafc",
-                "gridColor": "#1f2937",
-                "domainColor": "#94a3b8",
-            },
-            "legend": {"labelColor": "#e2e8f0", "titleColor": "#f8fafc"},
-            "range": {"category": ["#60a5fa", "#f472b6", "#34d399", "#facc15", "#a78bfa"]},
-        }
-    }
-
-
-alt.themes.register(ALT_DARK_THEME_NAME, _altair_dark_theme)
-
-
 def inject_theme_toggle_css():
     st.markdown(f"<style>{THEME_TOGGLE_CONTROL_CSS}</style>", unsafe_allow_html=True)
 
@@ -472,13 +600,6 @@ def apply_theme_css(theme_code: str) -> None:
         st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
 
 
-def apply_altair_theme(theme_code: str) -> None:
-    if theme_code == "dark":
-        alt.themes.enable(ALT_DARK_THEME_NAME)
-    else:
-        alt.themes.enable("default")
-
-
 def select_language_code() -> str:
     if LANGUAGE_WIDGET_KEY not in st.session_state:
         st.session_state[LANGUAGE_WIDGET_KEY] = "en"
@@ -494,245 +615,500 @@ def select_language_code() -> str:
     return selected_code
 
 
-def main():
-    st.set_page_config(page_title="Suivi BT", layout="wide")
+def select_journal_id(t) -> int | None:
+    """Journal named by the URL; unknown ones are only created on request."""
+    name = st.query_params.get(JOURNAL_QUERY_PARAM, DEFAULT_JOURNAL_NAME)
+    if not valid_journal_name(name):
+        st.error(t("journal_invalid", max=JOURNAL_NAME_MAX))
+        return None
+    journal_id = journal_id_for(name, create=False)
+    if journal_id is None:
+        st.info(t("journal_missing", name=name))
+        if not st.button(t("journal_create")):
+            return None
+        journal_id = journal_id_for(name)
+    st.sidebar.caption(t("journal_caption", name=name))
+    return journal_id
 
-    inject_theme_toggle_css()
-    theme_code = select_theme_code()
-    apply_theme_css(theme_code)
-    apply_altair_theme(theme_code)
 
-    language_code = select_language_code()
-    t = lambda key, **kwargs: TRANSLATIONS[key][language_code].format(**kwargs)
+def default_tab_section(language_code: str) -> str:
+    """Section whose tab starts open, carried over when the language changes."""
+    language, section = st.session_state.get(TAB_DEFAULT_KEY, (None, None))
+    if language != language_code:
+        section = st.session_state.get(OPEN_TAB_KEY, TAB_SECTIONS[0])
+        st.session_state[TAB_DEFAULT_KEY] = (language_code, section)
+    return section
 
-    init_db()
 
-    st.title(t("app_title"))
+def translator(language_code: str):
+    return lambda key, **kwargs: TRANSLATIONS[key][language_code].format(**kwargs)
 
-    df = load_all()
 
-    tab_saisie, tab_graphs, tab_histo = st.tabs(
-        [t("entry_tab"), t("graphs_tab"), t("history_tab")]
-    )
+def show_flash(section: str) -> None:
+    """Display a message queued for ``section`` before the last full rerun."""
+    flash = st.session_state.get(FLASH_KEY)
+    if flash and flash[0] == section:
+        del st.session_state[FLASH_KEY]
+        getattr(st, flash[2])(flash[1])
 
-    with tab_saisie:
-        st.subheader(t("entry_subheader"))
 
-        col_date, col_day = st.columns([1, 1])
-        with col_date:
-            selected_date = st.date_input(t("date_label"), value=date.today())
-        with col_day:
-            st.write(" ")
+def rerun_with_flash(section: str, message: str, kind: str = "success") -> None:
+    """Rerun the whole app after a write so every section sees the new data."""
+    st.session_state[FLASH_KEY] = (section, message, kind)
+    st.rerun(scope="app")
 
-        existing = load_entry(selected_date)
-        day_name = day_name_for_language(selected_date, language_code)
 
-        if existing:
-            st.info(t("existing_entry", day_name=day_name, date=selected_date))
-        else:
-            st.success(t("new_entry", day_name=day_name, date=selected_date))
-
-        def dv(key, default):
-            return existing.get(key) if existing and existing.get(key) is not None else default
-
-        st.markdown(f"### {t('section_drinks')}")
-        c1, c2, c3 = st.columns(3)
-        with c1:
-            water_l = st.number_input(t("water_input"), 0.0, 10.0, dv("water_l", 0.0), step=0.1)
-            coffee = st.number_input(t("coffee_input"), 0, 30, dv("coffee", 0), step=1)
-        with c2:
-            beer_l = st.number_input(t("beer_input"), 0.0, 10.0, dv("beer_l", 0.0), step=0.1)
-            alcool_cl = st.number_input(
-                t("alcohol_input"), 0.0, 100.0, dv("alcool_cl", 0.0), step=1.0
-            )
-        with c3:
-            wine_cl = st.number_input(t("wine_input"), 0.0, 200.0, dv("wine_cl", 0.0), step=5.0)
-            soda_l = st.number_input(t("soda_input"), 0.0, 10.0, dv("soda_l", 0.0), step=0.1)
-
-        st.markdown(f"#### {t('section_nicotine')}")
-        nico = st.number_input(
-            t("nico_input"),
-            0.0,
-            20.0,
-            dv("nico", 3.17),
-            step=0.01,
-            format="%.2f",
+def profiling_enabled() -> bool:
+    return profiling.enabled_by_env() or bool(st.session_state.get(PROFILE_WIDGET_KEY))
+
+
+def keep_profile(report: dict) -> None:
+    reports = st.session_state.setdefault(PROFILE_REPORTS_KEY, [])
+    reports.append(report)
+    del reports[:-PROFILE_HISTORY]
+
+
+def show_profile_overlay(t) -> None:
+    """Sidebar breakdown of the last profiled run plus recent run totals."""
+    reports = st.session_state.get(PROFILE_REPORTS_KEY)
+    if not reports:
+        return
+    latest = reports[-1]
+    spans = sorted(latest["spans"].items(), key=lambda item: -item[1]["ms"])
+    with st.sidebar.expander(t("profile_overlay"), expanded=True):
+        st.caption(t("profile_total", run=latest["run"], ms=latest["total_ms"]))
+        st.dataframe(
+            [{"span": name, "ms": round(e["ms"], 1), "calls": e["calls"]} for name, e in spans],
+            hide_index=True,
+        )
+        if latest["counters"]:
+            st.json(latest["counters"])
+        st.caption(t("profile_recent"))
+        st.dataframe(
+            [{"run": r["run"], "ms": round(r["total_ms"], 1)} for r in reversed(reports)],
+            hide_index=True,
         )
 
-        st.markdown(f"### {t('section_party')}")
-        c_soir1, c_soir2 = st.columns([1, 2])
-        with c_soir1:
-            soiree = st.checkbox(t("party_checkbox"), value=dv("soiree", False))
-        with c_soir2:
-            soiree_name = st.text_input(t("party_name"), value=dv("soiree_name", "") or "")
-
-        st.markdown(f"### {t('section_sleep')}")
-        c_sleep1, c_sleep2, c_sleep3 = st.columns(3)
-        with c_sleep1:
-            wake_default = dv("wake_time", time(6, 0))
-            wake_time = st.time_input(t("wake_label"), value=wake_default)
-        with c_sleep2:
-            sleep_default = dv("sleep_time", time(23, 0))
-            sleep_time = st.time_input(t("sleep_label"), value=sleep_default)
-        with c_sleep3:
-            sleep_hours = compute_sleep_hours(sleep_time, wake_time)
-            st.metric(t("sleep_metric"), f"{sleep_hours} h")
-
-        st.markdown(f"### {t('section_run')}")
-        c_run1, c_run2 = st.columns(2)
-        with c_run1:
-            ran = st.checkbox(t("ran_checkbox"), value=dv("ran", False))
-        with c_run2:
-            run_km = st.number_input(t("run_distance"), 0.0, 100.0, dv("run_km", 0.0), step=0.5)
-
-        st.markdown(f"### {t('section_weight')}")
-        weight = st.number_input(t("weight_input"), 0.0, 400.0, dv("weight", 0.0), step=0.1)
-
-        if st.button(t("save_button")):
-            data = {
-                "date": selected_date.isoformat(),
-                "day_name": day_name,
-                "nico": float(nico) if nico is not None else None,
-                "water_l": float(water_l),
-                "coffee": int(coffee),
-                "beer_l": float(beer_l),
-                "alcool_cl": float(alcool_cl),
-                "wine_cl": float(wine_cl),
-                "soda_l": float(soda_l),
-                "soiree": int(soiree),
-                "soiree_name": soiree_name if soiree else None,
-                "wake_time": wake_time.strftime("%H:%M") if wake_time else None,
-                "sleep_time": sleep_time.strftime("%H:%M") if sleep_time else None,
-                "sleep_hours": float(sleep_hours),
-                "ran": int(ran),
-                "run_km": float(run_km),
-                "weight": float(weight) if weight else None,
-            }
-            upsert_entry(data)
-            st.success(t("save_success"))
 
-    with tab_graphs:
-        st.subheader(t("graphs_subheader"))
+def timed_fragment(section: str):
+    """Render a tab body as an ``st.fragment`` and optionally caption its run time."""
 
-        if df.empty:
-            st.info(t("no_data_info"))
-        else:
-            df_sorted = df.sort_values("date").set_index("date")
+    def decorate(render):
+        @st.fragment
+        @functools.wraps(render)
+        def wrapper(language_code: str, *args):
+            started = perf_counter()
+            with profiling.run(section, enabled=profiling_enabled()) as report:
+                with profiling.span(f"fragment.{section}"):
+                    render(language_code, *args)
+            elapsed_ms = (perf_counter() - started) * 1000
+            if report is not None:
+                keep_profile(report)
 
-            st.markdown(f"#### {t('weight_chart_title')}")
-            chart_weight = make_dynamic_line_chart(df_sorted, "weight", t("weight_axis"))
-            if chart_weight is not None:
-                st.altair_chart(chart_weight, use_container_width=True)
-            else:
-                st.write(t("weight_chart_info"))
+            app_run = st.session_state.get(APP_RUN_KEY, 0)
+            last_runs = st.session_state.setdefault(FRAGMENT_RUNS_KEY, {})
+            scope = "fragment" if last_runs.get(section) == app_run else "app"
+            last_runs[section] = app_run
 
-            st.markdown(f"#### {t('sleep_chart_title')}")
-            chart_sleep = make_dynamic_line_chart(df_sorted, "sleep_hours", t("sleep_axis"))
-            if chart_sleep is not None:
-                st.altair_chart(chart_sleep, use_container_width=True)
-            else:
-                st.write(t("sleep_chart_info"))
+            if st.session_state.get(TIMINGS_WIDGET_KEY):
+                t = translator(language_code)
+                st.caption(
+                    t(
+                        "timing_caption",
+                        section=t(section),
+                        ms=elapsed_ms,
+                        scope=t(f"timing_scope_{scope}"),
+                    )
+                )
 
-            st.markdown(f"#### {t('nico_chart_title')}")
-            chart_nico = make_basic_line_chart(df_sorted, "nico", t("nico_axis"))
-            if chart_nico is not None:
-                st.altair_chart(chart_nico, use_container_width=True)
-            else:
-                st.write(t("nico_chart_info"))
+        return wrapper
+
+    return decorate
+
+
+@timed_fragment("entry_tab")
+def entry_fragment(language_code: str, journal_id: int) -> None:
+    t = translator(language_code)
+    st.subheader(t("entry_subheader"))
+    show_flash("entry")
+
+    col_date, col_day = st.columns([1, 1])
+    with col_date:
+        selected_date = st.date_input(t("date_label"), value=date.today())
+    with col_day:
+        st.write(" ")
+
+    existing = load_entry(selected_date, journal_id=journal_id)
+    day_name = day_name_for_language(selected_date, language_code)
+
+    if existing:
+        st.info(t("existing_entry", day_name=day_name, date=selected_date))
+    else:
+        st.success(t("new_entry", day_name=day_name, date=selected_date))
+
+    def dv(key, default):
+        return existing.get(key) if existing and existing.get(key) is not None else default
+
+    st.markdown(f"### {t('section_drinks')}")
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        water_l = st.number_input(t("water_input"), 0.0, 10.0, dv("water_l", 0.0), step=0.1)
+        coffee = st.number_input(t("coffee_input"), 0, 30, dv("coffee", 0), step=1)
+    with c2:
+        beer_l = st.number_input(t("beer_input"), 0.0, 10.0, dv("beer_l", 0.0), step=0.1)
+        alcool_cl = st.number_input(
+            t("alcohol_input"), 0.0, 100.0, dv("alcool_cl", 0.0), step=1.0
+        )
+    with c3:
+        wine_cl = st.number_input(t("wine_input"), 0.0, 200.0, dv("wine_cl", 0.0), step=5.0)
+        soda_l = st.number_input(t("soda_input"), 0.0, 10.0, dv("soda_l", 0.0), step=0.1)
 
-            st.markdown(f"#### {t('run_chart_title')}")
-            chart_run = make_basic_line_chart(df_sorted, "run_km", t("run_axis"))
-            if chart_run is not None:
-                st.altair_chart(chart_run, use_container_width=True)
+    st.markdown(f"#### {t('section_nicotine')}")
+    nico = st.number_input(
+        t("nico_input"),
+        0.0,
+        20.0,
+        dv("nico", 3.17),
+        step=0.01,
+        format="%.2f",
+    )
+
+    st.markdown(f"### {t('section_party')}")
+    c_soir1, c_soir2 = st.columns([1, 2])
+    with c_soir1:
+        soiree = st.checkbox(t("party_checkbox"), value=dv("soiree", False))
+    with c_soir2:
+        soiree_name = st.text_input(t("party_name"), value=dv("soiree_name", "") or "")
+
+    st.markdown(f"### {t('section_sleep')}")
+    c_sleep1, c_sleep2, c_sleep3 = st.columns(3)
+    with c_sleep1:
+        wake_default = dv("wake_time", time(6, 0))
+        wake_time = st.time_input(t("wake_label"), value=wake_default)
+    with c_sleep2:
+        sleep_default = dv("sleep_time", time(23, 0))
+        sleep_time = st.time_input(t("sleep_label"), value=sleep_default)
+    with c_sleep3:
+        sleep_hours = compute_sleep_hours(sleep_time, wake_time)
+        st.metric(t("sleep_metric"), f"{sleep_hours} h")
+
+    st.markdown(f"### {t('section_run')}")
+    c_run1, c_run2 = st.columns(2)
+    with c_run1:
+        ran = st.checkbox(t("ran_checkbox"), value=dv("ran", False))
+    with c_run2:
+        run_km = st.number_input(t("run_distance"), 0.0, 100.0, dv("run_km", 0.0), step=0.5)
+
+    st.markdown(f"### {t('section_weight')}")
+    weight = st.number_input(t("weight_input"), 0.0, 400.0, dv("weight", 0.0), step=0.1)
+
+    if st.button(t("save_button")):
+        data = {
+            "date": selected_date.isoformat(),
+            "day_name": day_name,
+            "nico": float(nico) if nico is not None else None,
+            "water_l": float(water_l),
+            "coffee": int(coffee),
+            "beer_l": float(beer_l),
+            "alcool_cl": float(alcool_cl),
+            "wine_cl": float(wine_cl),
+            "soda_l": float(soda_l),
+            "soiree": int(soiree),
+            "soiree_name": soiree_name if soiree else None,
+            "wake_time": wake_time.strftime("%H:%M") if wake_time else None,
+            "sleep_time": sleep_time.strftime("%H:%M") if sleep_time else None,
+            "sleep_hours": float(sleep_hours),
+            "ran": int(ran),
+            "run_km": float(run_km),
+            "weight": float(weight) if weight else None,
+        }
+        upsert_entry(data, journal_id=journal_id)
+        rerun_with_flash("entry", t("save_success"))
+
+
+@timed_fragment("graphs_tab")
+def charts_fragment(language_code: str, theme_code: str, journal_id: int) -> None:
+    from core.charts import (
+        DARK_THEME,
+        cached_chart_spec,
+        make_dashboard,
+        point_budget,
+        spec_size,
+    )
+
+    t = translator(language_code)
+    st.subheader(t("graphs_subheader"))
+
+    bounds = date_bounds(journal_id)
+    if bounds is None:
+        st.info(t("no_data_info"))
+    else:
+        first_day, last_day = bounds
+        default_start = max(first_day, last_day - timedelta(days=CHART_DEFAULT_DAYS))
+        picked = st.date_input(
+            t("date_range_label"),
+            value=(default_start, last_day),
+            min_value=first_day,
+            max_value=last_day,
+        )
+        range_start = picked[0] if picked else default_start
+        range_end = picked[1] if len(picked) > 1 else last_day
+        granularity = st.radio(
+            t("granularity_label"),
+            list(GRANULARITY_LABELS),
+            format_func=lambda g: GRANULARITY_LABELS[g][language_code],
+            horizontal=True,
+        )
+
+        @functools.cache
+        def chart_frame():
+            if granularity == "day":
+                df_chart = load_range(
+                    range_start, range_end, CHART_COLUMNS, journal_id=journal_id
+                )
             else:
-                st.write(t("run_chart_info"))
+                df_chart = load_rollup(
+                    granularity, range_start, range_end, CHART_COLUMNS, journal_id=journal_id
+                )
+            return df_chart.set_index("date")
+
+        max_points = point_budget(CHART_WIDTH_PX)
+        version = data_version(journal_id)
+        alt_theme = DARK_THEME if theme_code == "dark" else "default"
 
-            st.markdown(f"#### {t('liquids_section')}")
+        liquid_options = {
+            LIQUID_LABELS[field][language_code]: field for field in LIQUID_FIELDS
+        }
+        reverse_label = {v: k for k, v in liquid_options.items()}
 
-            liquid_options = {
-                LIQUID_LABELS[field][language_code]: field for field in LIQUID_FIELDS
+        selected_liquids = st.multiselect(
+            t("liquid_select"),
+            list(liquid_options.keys()),
+            default=list(liquid_options.keys()),
+        )
+        if not selected_liquids:
+            st.info(t("liquid_info_empty"))
+        cols = [liquid_options[label] for label in selected_liquids]
+
+        panels = [
+            {
+                "column": y_col,
+                "dynamic": dynamic,
+                "title": t(prefix + "_chart_title"),
+                "label": t(prefix + "_axis"),
+                "empty": t(prefix + "_chart_info"),
+            }
+            for y_col, dynamic, prefix in CHART_PANELS
+        ]
+        liquids = None
+        if cols:
+            liquids = {
+                "columns": cols,
+                "labels": reverse_label,
+                "title": t("liquids_section"),
+                "empty": t("liquid_no_data"),
             }
-            reverse_label = {v: k for k, v in liquid_options.items()}
-
-            selected_liquids = st.multiselect(
-                t("liquid_select"),
-                list(liquid_options.keys()),
-                default=list(liquid_options.keys()),
-            )
-
-            if selected_liquids:
-                cols = [liquid_options[label] for label in selected_liquids]
-                chart_liquids = make_liquids_chart(df_sorted, cols, reverse_label)
-                if chart_liquids is not None:
-                    st.altair_chart(chart_liquids, use_container_width=True)
-                else:
-                    st.info(t("liquid_no_data"))
-            else:
-                st.info(t("liquid_info_empty"))
 
-    with tab_histo:
-        st.subheader(t("history_subheader"))
+        spec = cached_chart_spec(
+            lambda: make_dashboard(
+                chart_frame(), panels, liquids, max_points=max_points, width=CHART_WIDTH_PX
+            ),
+            data_version=version,
+            columns=CHART_COLUMNS,
+            date_range=(range_start, range_end, granularity),
+            theme=alt_theme,
+            language=language_code,
+            extra=(max_points, *cols),
+        )
+        if spec is not None:
+            if profiling.active():
+                profiling.count("chart_spec_bytes", spec_size(spec))
+            with profiling.span("charts.render"):
+                st.vega_lite_chart(spec)
+
 
-        st.markdown(f"### {t('export_section')}")
-        if df.empty:
-            st.info(t("export_info"))
+@st.fragment(run_every=IMPORT_POLL_SECONDS)
+def import_job_fragment(language_code: str, job_id: str) -> None:
+    """Poll a background import; rerun the app with its outcome once it ends."""
+    from core.import_export import JOB_ACTIVE_STATES, cancel_import, job_status
+
+    t = translator(language_code)
+    job = job_status(job_id)
+    if job is not None and job["state"] in JOB_ACTIVE_STATES:
+        if job["state"] == "queued":
+            text = t("import_queued")
         else:
-            csv_data = df.to_csv(index=False).encode("utf-8")
-            st.download_button(
-                label=t("export_button"),
-                data=csv_data,
-                file_name="journal_bt.csv",
-                mime="text/csv",
-            )
-
-        st.markdown("---")
-
-        st.markdown(f"### {t('import_section')}")
-        uploaded_file = st.file_uploader(
-            t("import_label"),
-            type=["csv"],
-            help=t("import_help"),
+            text = t("import_progress", parsed=job["rows_parsed"], rows=job["rows_written"])
+        st.progress(job["fraction"] or 0.0, text=text)
+        st.button(t("import_cancel"), on_click=cancel_import, args=(job_id,))
+        return
+
+    if st.session_state.get(IMPORT_JOB_KEY) == job_id:
+        del st.session_state[IMPORT_JOB_KEY]
+    if job is None:
+        st.rerun(scope="app")
+    elif job["state"] == "done":
+        counts = {key: job[key] for key in ("inserted", "updated", "unchanged")}
+        rerun_with_flash("history", t("import_success", **counts))
+    elif job["state"] == "cancelled":
+        rerun_with_flash("history", t("import_cancelled", rows=job["rows_written"]), "warning")
+    else:
+        rerun_with_flash("history", t("import_error", error=job["error"]), "error")
+
+
+@timed_fragment("history_tab")
+def history_fragment(language_code: str, journal_id: int) -> None:
+    from core.import_export import (
+        EXPORT_FORMATS,
+        IMPORT_CHUNK_ROWS,
+        IMPORT_TYPES,
+        export_journal,
+        job_status,
+        submit_import,
+    )
+
+    t = translator(language_code)
+    st.subheader(t("history_subheader"))
+    show_flash("history")
+
+    df = load_all_cached(journal_id)
+
+    st.markdown(f"### {t('export_section')}")
+    if df.empty:
+        st.info(t("export_info"))
+    else:
+        export_format = st.radio(
+            t("export_format"), list(EXPORT_FORMATS), horizontal=True
+        )
+        st.download_button(
+            label=t("export_button"),
+            data=functools.partial(export_journal, export_format, journal_id=journal_id),
+            file_name=f"journal_bt.{export_format}",
+            mime=EXPORT_FORMATS[export_format],
+            on_click="ignore",
         )
 
-        if uploaded_file is not None:
-            try:
-                n = import_csv_to_db(uploaded_file)
-                st.success(t("import_success", rows=n))
-            except Exception as e:
-                st.error(t("import_error", error=e))
+    st.markdown("---")
 
-        st.markdown("---")
+    st.markdown(f"### {t('import_section')}")
+    uploaded_files = st.file_uploader(
+        t("import_label"),
+        type=list(IMPORT_TYPES),
+        accept_multiple_files=True,
+        help=t("import_help"),
+    )
+    upload_ids = tuple(f.file_id for f in uploaded_files or ())
 
-        df = load_all()
-        if df.empty:
-            st.info(t("no_data_info"))
+    # The upload stays set across reruns, so each selection is submitted once;
+    # submit_import also returns the earlier job for identical bytes.
+    if upload_ids and upload_ids != st.session_state.get(IMPORTED_UPLOAD_KEY):
+        st.session_state[IMPORTED_UPLOAD_KEY] = upload_ids
+        submitted = datetime.now().timestamp()
+        if len(uploaded_files) == 1:
+            data = uploaded_files[0].getvalue()
         else:
-            df_view = df[
-                [
-                    "date",
-                    "day_name",
-                    "nico",
-                    "water_l",
-                    "coffee",
-                    "beer_l",
-                    "alcool_cl",
-                    "wine_cl",
-                    "soda_l",
-                    "soiree",
-                    "soiree_name",
-                    "sleep_hours",
-                    "ran",
-                    "run_km",
-                    "weight",
-                ]
-            ].sort_values("date")
-            df_view = df_view.copy()
-            df_view["day_name"] = df_view["date"].apply(
-                lambda d: day_name_for_language(d, language_code)
-            )
+            data = [(f.name, f.getvalue()) for f in uploaded_files]
+        job_id = submit_import(
+            data,
+            journal_id,
+            chunksize=IMPORT_CHUNK_ROWS,
+            name=", ".join(f.name for f in uploaded_files),
+        )
+        job = job_status(job_id)
+        if job is not None and job["state"] == "done" and job["submitted"] < submitted:
+            st.info(t("import_duplicate", rows=job["rows_written"]))
+        else:
+            st.session_state[IMPORT_JOB_KEY] = job_id
+
+    if st.session_state.get(IMPORT_JOB_KEY):
+        import_job_fragment(language_code, st.session_state[IMPORT_JOB_KEY])
+
+    st.markdown("---")
+
+    if df.empty:
+        st.info(t("no_data_info"))
+    else:
+        df_view = df[
+            [
+                "date",
+                "day_name",
+                "nico",
+                "water_l",
+                "coffee",
+                "beer_l",
+                "alcool_cl",
+                "wine_cl",
+                "soda_l",
+                "soiree",
+                "soiree_name",
+                "sleep_hours",
+                "ran",
+                "run_km",
+                "weight",
+            ]
+        ].sort_values("date")
+        df_view = df_view.copy()
+        df_view["day_name"] = df_view["date"].apply(
+            lambda d: day_name_for_language(d, language_code)
+        )
 
+        if profiling.active():
+            profiling.count("dataframe_bytes", df_view.memory_usage(deep=True).sum())
+        with profiling.span("history.dataframe"):
             st.dataframe(df_view, use_container_width=True)
 
 
+def render_tabs(t, language_code: str, theme_code: str, journal_id: int) -> None:
+    # Only the open tab runs, so charting and CSV machinery load the
+    # first time their tab is opened rather than before the entry form.
+    tab_saisie, tab_graphs, tab_histo = st.tabs(
+        [t(section) for section in TAB_SECTIONS],
+        default=t(default_tab_section(language_code)),
+        key=TABS_WIDGET_KEY,
+        on_change="rerun",
+    )
+    for section, tab in zip(TAB_SECTIONS, (tab_saisie, tab_graphs, tab_histo)):
+        if tab.open:
+            st.session_state[OPEN_TAB_KEY] = section
+
+    if tab_saisie.open:
+        with tab_saisie:
+            entry_fragment(language_code, journal_id)
+    if tab_graphs.open:
+        with tab_graphs:
+            charts_fragment(language_code, theme_code, journal_id)
+    if tab_histo.open:
+        with tab_histo:
+            history_fragment(language_code, journal_id)
+
+
+def main():
+    st.set_page_config(page_title="Suivi BT", layout="wide")
+
+    with profiling.run("app", enabled=profiling_enabled()) as report:
+        with profiling.span("app.css"):
+            inject_theme_toggle_css()
+        theme_code = select_theme_code()
+        with profiling.span("app.css"):
+            apply_theme_css(theme_code)
+
+        language_code = select_language_code()
+        t = translator(language_code)
+        st.sidebar.checkbox(t("timings_toggle"), key=TIMINGS_WIDGET_KEY)
+        st.sidebar.checkbox(t("profile_toggle"), key=PROFILE_WIDGET_KEY)
+        st.session_state[APP_RUN_KEY] = st.session_state.get(APP_RUN_KEY, 0) + 1
+
+        init_db()
+
+        st.title(t("app_title"))
+        journal_id = select_journal_id(t)
+        if journal_id is not None:
+            render_tabs(t, language_code, theme_code, journal_id)
+
+    if report is not None:
+        keep_profile(report)
+        show_profile_overlay(t)
+
+
 if __name__ == "__main__":
     main()
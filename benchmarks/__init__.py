@@ -0,0 +1 @@
+"""Performance benchmarks for the core modules (not shipped with the app)."""
@@ -0,0 +1,50 @@
+"""Compare python-engine separator sniffing with the sniffed C-engine reader.
+
+    python -m benchmarks.bench_csv_dialect [rows ...]
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from core.import_export import read_csv_fast
+from benchmarks.generator import write_excel_csv
+
+
+def _best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes=(10_000, 100_000)) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = write_excel_csv(Path(tmp) / f"journal_{rows}.csv", rows)
+            python_s = _best_of(lambda: pd.read_csv(path, engine="python", sep=None))
+            with open(path, "rb") as fh:
+                fast_s = _best_of(lambda: (fh.seek(0), read_csv_fast(fh)))
+            results.append(
+                {
+                    "rows": rows,
+                    "python_sniff_s": round(python_s, 4),
+                    "c_engine_s": round(fast_s, 4),
+                    "speedup": round(python_s / fast_s, 1),
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or (10_000, 100_000)
+    print(json.dumps(run(sizes), indent=2))
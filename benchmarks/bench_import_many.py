@@ -0,0 +1,88 @@
+"""Time multi-file imports against the number of parsing worker processes.
+
+    python -m benchmarks.bench_import_many [--files 240] [--rows 31]
+                                           [--workers 1 2 4] [--zip]
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+import zipfile
+
+import pandas as pd
+
+import core.db as db
+from core.import_export import import_csv_to_db
+from benchmarks.generator import excel_frame
+
+
+def write_monthly_csvs(folder: Path, files: int, rows: int) -> list[Path]:
+    paths = []
+    for index in range(files):
+        start = (pd.Timestamp(date(2000, 1, 1)) + pd.DateOffset(months=index)).date()
+        path = folder / f"journal_{start:%Y_%m}.csv"
+        excel_frame(rows, start=start, seed=index).to_csv(
+            path, sep=";", decimal=",", index=False, encoding="utf-8-sig"
+        )
+        paths.append(path)
+    return paths
+
+
+def run(files: int, rows: int, workers_list, bundle: bool) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        sources = write_monthly_csvs(tmp, files, rows)
+        if bundle:
+            archive = tmp / "journal.zip"
+            with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+                for path in sources:
+                    zf.write(path, path.name)
+            sources = [archive]
+        for workers in workers_list:
+            db.close_all()
+            db.DB_PATH = tmp / f"import_{workers}.db"
+            db.init_db()
+            start = time.perf_counter()
+            written = import_csv_to_db(sources, workers=workers)["rows"]
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "files": files,
+                    "workers": workers,
+                    "zip": bundle,
+                    "rows_written": written,
+                    "seconds": round(elapsed, 3),
+                    "rows_per_s": round(written / elapsed),
+                }
+            )
+        db.close_all()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=240)
+    parser.add_argument("--rows", type=int, default=31)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--zip", action="store_true")
+    args = parser.parse_args(argv)
+
+    original = db.DB_PATH
+    try:
+        results = run(args.files, args.rows, sorted(set(args.workers)), args.zip)
+    finally:
+        db.DB_PATH = original
+    print(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+"""Time the core paths, app reruns and startup; exit 1 on a baseline regression.
+
+    python -m benchmarks.bench_suite [--rows 1 1000 10000] [--out results.json]
+                                     [--baseline benchmarks/baseline.json]
+                                     [--save-baseline] [--tolerance 0.25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date
+import itertools
+import json
+import os
+from pathlib import Path
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import pandas as pd
+
+from core import profiling
+import core.db as db
+from core.charts import (
+    chart_to_spec,
+    make_basic_line_chart,
+    make_dashboard,
+    make_dynamic_line_chart,
+    make_liquids_chart,
+    point_budget,
+    spec_size,
+)
+from core.import_export import import_csv_to_db
+from benchmarks.generator import journal_frame, write_excel_csv, write_journal_db
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_ROWS = (1, 1_000, 10_000)
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_TOLERANCE = 0.25
+# Heavy modules app.py must not import before the entry form is drawn.
+DEFERRED_MODULES = ("pandas", "numpy", "altair", "pyarrow")
+SERVER_BOOT_TIMEOUT_S = 60
+LIQUIDS = ["water_l", "beer_l", "wine_cl", "alcool_cl", "soda_l"]
+PANELS = [
+    {"column": "weight", "dynamic": True, "title": "Weight", "label": "kg", "empty": "-"},
+    {"column": "sleep_hours", "dynamic": True, "title": "Sleep", "label": "h", "empty": "-"},
+    {"column": "nico", "dynamic": False, "title": "Nicotine", "label": "%", "empty": "-"},
+    {"column": "run_km", "dynamic": False, "title": "Run", "label": "km", "empty": "-"},
+]
+
+
+def _timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "median_s": round(statistics.median(samples), 6),
+        "best_s": round(min(samples), 6),
+        "repeat": repeat,
+    }
+
+
+def _repeat_for(rows: int) -> int:
+    return 3 if rows >= 100_000 else 5
+
+
+def _use_db(path: Path) -> None:
+    db.close_all()
+    db.DB_PATH = path
+
+
+def _bench_db(tmp: Path, rows: int, repeat: int) -> list[dict]:
+    _use_db(tmp / f"journal_{rows}.db")
+    write_journal_db(rows)
+    middle = date.fromisoformat(journal_frame(rows)["date"].iloc[rows // 2])
+    (entry,) = json.loads(journal_frame(1, start=middle, seed=1).to_json(orient="records"))
+    edits = itertools.count(1)
+
+    def upsert():
+        # A fresh value each time: re-saving the same row would only time
+        # the unchanged-row skip.
+        db.upsert_entry({**entry, "nico": round(entry["nico"] + next(edits) / 100, 2)})
+
+    return [
+        {"name": "load_all", **_timed(db.load_all, repeat)},
+        {"name": "load_entry", **_timed(lambda: db.load_entry(middle), repeat)},
+        {"name": "upsert_entry", **_timed(upsert, repeat)},
+    ]
+
+
+def _bench_import(tmp: Path, rows: int, repeat: int) -> list[dict]:
+    csv_path = write_excel_csv(tmp / f"journal_{rows}.csv", rows)
+
+    def run():
+        _use_db(tmp / f"import_{rows}.db")
+        db.DB_PATH.unlink(missing_ok=True)
+        db.init_db()
+        import_csv_to_db(csv_path, chunksize=2000)
+
+    def again():
+        import_csv_to_db(csv_path, chunksize=2000)
+
+    return [
+        {"name": "import_csv_to_db", **_timed(run, repeat)},
+        # The last run left the file in the database: every row is unchanged.
+        {"name": "reimport_unchanged", **_timed(again, repeat)},
+    ]
+
+
+def _bench_charts(rows: int, repeat: int) -> list[dict]:
+    df = journal_frame(rows)
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+    df = df.set_index("date")
+    max_points = point_budget()
+    labels = {col: col for col in LIQUIDS}
+    factories = {
+        "make_dynamic_line_chart": lambda: make_dynamic_line_chart(
+            df, "weight", "kg", max_points=max_points
+        ),
+        "make_basic_line_chart": lambda: make_basic_line_chart(
+            df, "nico", "%", max_points=max_points
+        ),
+        "make_liquids_chart": lambda: make_liquids_chart(
+            df, LIQUIDS, labels, max_points=max_points
+        ),
+        "make_dashboard": lambda: make_dashboard(
+            df,
+            PANELS,
+            {"columns": LIQUIDS, "labels": labels, "title": "Liquids", "empty": "-"},
+            max_points=max_points,
+        ),
+    }
+
+    def to_spec(build):
+        # Factories return None when there is nothing to plot.
+        chart = build()
+        return chart_to_spec(chart) if chart is not None else None
+
+    results = []
+    for name, build in factories.items():
+        timing = _timed(lambda: to_spec(build), repeat)
+        results.append({"name": name, **timing, "spec_bytes": spec_size(to_spec(build))})
+    return results
+
+
+def _bench_app(tmp: Path, rows: int, repeat: int) -> list[dict]:
+    from streamlit.testing.v1 import AppTest
+
+    from app import TABS_WIDGET_KEY
+
+    # The script imports core.db from sys.modules, so it sees this DB_PATH.
+    _use_db(tmp / f"journal_{rows}.db")
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=600)
+    first = _timed(at.run, 1)
+    if at.exception:
+        raise RuntimeError(f"app.py raised: {at.exception[0].value}")
+    labels = [tab.label for tab in at.tabs]
+
+    def rerun_tabs():
+        # Only the open tab's fragment runs, so open each one in turn.
+        for label in labels:
+            at.session_state[TABS_WIDGET_KEY] = label
+            at.run()
+            if at.exception:
+                raise RuntimeError(f"app.py raised on {label!r}: {at.exception[0].value}")
+
+    rerun = _timed(rerun_tabs, repeat)
+    rerun["spans_ms"] = _profiled_spans(rerun_tabs, tmp / f"profile_{rows}.jsonl", repeat)
+    return [{"name": "app_first_run", **first}, {"name": "app_rerun", **rerun}]
+
+
+def _profiled_spans(rerun, log_path: Path, repeat: int) -> dict:
+    """Median per-span time over ``repeat`` extra tab cycles with profiling on."""
+    saved = {key: os.environ.get(key) for key in (profiling.ENV_ENABLED, profiling.ENV_LOG)}
+    os.environ[profiling.ENV_ENABLED] = "1"
+    os.environ[profiling.ENV_LOG] = str(log_path)
+    try:
+        for _ in range(repeat):
+            rerun()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    reports = [r for r in profiling.read_log(log_path) if r["run"] == "app"]
+    names = sorted({name for r in reports for name in r["spans"]})
+    # Each tab's fragment only shows up in the runs where that tab is open.
+    return {
+        name: round(
+            statistics.median(r["spans"][name]["ms"] for r in reports if name in r["spans"]), 3
+        )
+        for name in names
+    }
+
+
+def _import_profile() -> tuple[float, list[str], list[dict]]:
+    """Import ``app`` under ``-X importtime``: self time, deferred modules, slowest packages."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us, packages, loaded = 0, {}, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[12:].split("|"))
+        if not self_us.isdigit():
+            continue
+        total_us += int(self_us)
+        loaded.add(name)
+        if not name.startswith("."):
+            top = name.split(".")[0]
+            packages[top] = max(packages.get(top, 0), int(cumulative_us))
+    slowest = sorted(packages.items(), key=lambda item: -item[1])[:5]
+    return (
+        total_us / 1e6,
+        [m for m in DEFERRED_MODULES if m in loaded],
+        [{"module": name, "ms": round(us / 1000, 1)} for name, us in slowest],
+    )
+
+
+def _bench_import_time(repeat: int) -> list[dict]:
+    profiles = [_import_profile() for _ in range(repeat)]
+    totals = [total for total, _, _ in profiles]
+    _, eager, slowest = profiles[0]
+    return [
+        {
+            "name": "import_app",
+            "median_s": round(statistics.median(totals), 6),
+            "best_s": round(min(totals), 6),
+            "repeat": repeat,
+            "eager_modules": eager,
+            "slowest_imports": slowest,
+        }
+    ]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _session_first_paint(port: int, label: str) -> float:
+    """Open one session and return the seconds until the entry form's button arrives."""
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    import websockets
+
+    began = time.perf_counter()
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    async with websockets.connect(url, max_size=None) as ws:
+        request = BackMsg()
+        request.rerun_script.query_string = ""
+        await ws.send(request.SerializeToString())
+        async for raw in ws:
+            msg = ForwardMsg.FromString(raw)
+            kind = msg.WhichOneof("type")
+            element = msg.delta.new_element if kind == "delta" else None
+            if element is not None and element.WhichOneof("type") == "button":
+                if element.button.label == label:
+                    return time.perf_counter() - began
+            if kind == "script_finished":
+                break
+    raise RuntimeError("the session finished without drawing the entry form")
+
+
+def _bench_first_paint(db_path: Path, servers: int, sessions: int) -> list[dict]:
+    """Time the entry form on fresh servers: first session (cold) and the rest."""
+    from app import TRANSLATIONS
+
+    label = TRANSLATIONS["save_button"]["en"]
+    cold, warm, boot = [], [], []
+    for _ in range(servers):
+        port = _free_port()
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", str(ROOT / "app.py"),
+                "--server.headless", "true",
+                "--server.port", str(port),
+                "--server.fileWatcherType", "none",
+                "--browser.gatherUsageStats", "false",
+            ],
+            cwd=ROOT,
+            env={**os.environ, "BT_DB_PATH": str(db_path)},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                try:
+                    urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+                    break
+                except OSError:
+                    if time.perf_counter() - started > SERVER_BOOT_TIMEOUT_S:
+                        raise RuntimeError("streamlit server did not come up")
+                    time.sleep(0.05)
+            boot.append(time.perf_counter() - started)
+            cold.append(asyncio.run(_session_first_paint(port, label)))
+            warm += [asyncio.run(_session_first_paint(port, label)) for _ in range(sessions)]
+        finally:
+            server.terminate()
+            server.wait()
+
+    def timing(samples):
+        return {
+            "median_s": round(statistics.median(samples), 6),
+            "best_s": round(min(samples), 6),
+            "repeat": len(samples),
+        }
+
+    return [
+        {"name": "server_boot", **timing(boot)},
+        {"name": "entry_first_paint_cold", **timing(cold)},
+        {"name": "entry_first_paint", **timing(warm)},
+    ]
+
+
+def run(sizes=DEFAULT_ROWS) -> dict:
+    results = []
+    original = db.DB_PATH
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            for rows in sizes:
+                repeat = _repeat_for(rows)
+                cases = (
+                    _bench_db(tmp, rows, repeat)
+                    + _bench_import(tmp, rows, repeat)
+                    + _bench_charts(rows, repeat)
+                    + _bench_app(tmp, rows, repeat)
+                )
+                cases += _bench_first_paint(db.DB_PATH, min(repeat, 3), repeat)
+                results += [{"rows": rows, **case} for case in cases]
+                db.close_all()
+            results += [{"rows": 0, **case} for case in _bench_import_time(5)]
+    finally:
+        _use_db(original)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[dict]:
+    """Return the cases that got slower (median), grew their spec or import more eagerly."""
+    previous = {(r["name"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get((result["name"], result["rows"]))
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"] if before["median_s"] else 1.0
+        grew = result.get("spec_bytes", 0) > before.get("spec_bytes", float("inf"))
+        eager = set(result.get("eager_modules", [])) - set(before.get("eager_modules", []))
+        if ratio > 1 + tolerance or grew or eager:
+            regressions.append(
+                {
+                    "name": result["name"],
+                    "rows": result["rows"],
+                    "ratio": round(ratio, 2),
+                    "spec_bytes": [before.get("spec_bytes"), result.get("spec_bytes")],
+                    "eager_modules": sorted(eager),
+                }
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--out", type=Path)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    report = run(args.rows)
+    if args.baseline.exists() and not args.save_baseline:
+        report["regressions"] = compare(
+            report, json.loads(args.baseline.read_text()), args.tolerance
+        )
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text)
+    if args.save_baseline:
+        args.baseline.write_text(text)
+    print(text)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Load-test concurrent saves through the writer queue against direct writes.
+
+    python -m benchmarks.bench_writer [--sessions 50] [--saves 40]
+                                      [--imports 2] [--import-rows 5000]
+                                      [--mode queue direct]
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date
+import json
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import core.db as db
+from core import writer
+from benchmarks.generator import journal_frame, write_journal_db
+
+IMPORT_CHUNK_ROWS = 2000
+
+
+def _direct_upsert(data: dict, journal_id: int) -> None:
+    with db.get_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        version = db._next_row_version(conn, journal_id)
+        _, days = db._write_rows(conn, journal_id, [db._entry_params(data)], version)
+        if days:
+            db._refresh_rollups(conn, journal_id, days)
+        conn.commit()
+
+
+def _direct_many(frame, journal_id: int) -> None:
+    params = db._storage_params(frame)
+    with db.get_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        version = db._next_row_version(conn, journal_id)
+        _, days = db._write_rows(conn, journal_id, params, version)
+        if days:
+            db._refresh_rollups(conn, journal_id, days)
+        conn.commit()
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_mode(
+    tmp: Path, mode: str, sessions: int, saves: int, imports: int, import_rows: int
+) -> dict:
+    db.close_all()
+    db.DB_PATH = tmp / f"writer_{mode}.db"
+    write_journal_db(1000)
+    save = (lambda d, j: db.upsert_entry(d, journal_id=j)) if mode == "queue" else _direct_upsert
+    save_many = (
+        (lambda f, j: db.upsert_many(f, journal_id=j)) if mode == "queue" else _direct_many
+    )
+    entries = json.loads(journal_frame(sessions * saves, seed=7).to_json(orient="records"))
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(sessions + imports + 1)
+    done = threading.Event()
+
+    def session(index: int) -> None:
+        mine = entries[index * saves : (index + 1) * saves]
+        start_gate.wait()
+        for entry in mine:
+            began = time.perf_counter()
+            try:
+                save(entry, db.DEFAULT_JOURNAL_ID)
+            except Exception as exc:
+                with lock:
+                    errors.append(type(exc).__name__ + ": " + str(exc))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - began)
+
+    def importer(index: int) -> None:
+        # Unchanged rows are skipped, so passes alternate between two datasets
+        # to keep every chunk a real write.
+        frames = [
+            journal_frame(import_rows, start=date(1990, 1, 1), seed=100 + index + 50 * k)
+            for k in range(2)
+        ]
+        journal_id = 100 + index
+        start_gate.wait()
+        passes = 0
+        while not done.is_set():
+            frame = frames[passes % 2]
+            passes += 1
+            for chunk_start in range(0, len(frame), IMPORT_CHUNK_ROWS):
+                try:
+                    save_many(frame.iloc[chunk_start : chunk_start + IMPORT_CHUNK_ROWS], journal_id)
+                except Exception as exc:
+                    with lock:
+                        errors.append("import " + type(exc).__name__ + ": " + str(exc))
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    loaders = [threading.Thread(target=importer, args=(i,)) for i in range(imports)]
+    before = writer.writer_stats()
+    for thread in threads + loaders:
+        thread.start()
+    start_gate.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    done.set()
+    for thread in loaders:
+        thread.join()
+    after = writer.writer_stats()
+    db.close_all()
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "saves": len(latencies),
+        "failed_saves": len([e for e in errors if not e.startswith("import ")]),
+        "failed_imports": len([e for e in errors if e.startswith("import ")]),
+        "first_error": errors[0] if errors else None,
+        "saves_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "writer": {key: after[key] - before[key] for key in ("groups", "writes", "retries")}
+        | {"largest_group": after["largest_group"]},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--saves", type=int, default=40)
+    parser.add_argument("--imports", type=int, default=2)
+    parser.add_argument("--import-rows", type=int, default=5000)
+    parser.add_argument("--mode", nargs="+", default=["queue", "direct"])
+    args = parser.parse_args(argv)
+
+    original = db.DB_PATH
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = [
+                run_mode(Path(tmp), mode, args.sessions, args.saves, args.imports, args.import_rows)
+                for mode in args.mode
+            ]
+    finally:
+        db.close_all()
+        db.DB_PATH = original
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Seeded generators for realistic journal data and Excel-style CSV exports."""
+
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+EXCEL_HEADERS = {
+    "date": "Temps",
+    "day_name": "V_jour",
+    "nico": "%nico",
+    "water_l": "L_eau",
+    "coffee": "T_coffee",
+    "beer_l": "L_bière",
+    "alcool_cl": "cl_alcool",
+    "wine_cl": "cl_vin",
+    "soda_l": "L_soda",
+    "soiree": "B_soiree",
+    "soiree_name": "N_soiree",
+    "wake_time": "V_debout",
+    "sleep_time": "V_couche",
+    "sleep_hours": "V_somm",
+    "ran": "B_courrir",
+    "run_km": "V_courrir",
+    "weight": "V_poids",
+}
+FRENCH_DAYS = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
+
+
+def excel_frame(rows: int, start: date = date(2000, 1, 1), seed: int = 0) -> pd.DataFrame:
+    """Daily rows shaped like the DB_DATA_SCADA sheet (times as fractional hours)."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(start, periods=rows, freq="D")
+    wake = rng.normal(7.0, 0.6, rows).clip(4, 11)
+    sleep = (rng.normal(23.3, 0.8, rows) % 24).round(4)
+    party = rng.random(rows) < 0.12
+    ran = rng.random(rows) < 0.3
+    return pd.DataFrame(
+        {
+            "Temps": days.strftime("%d/%m/%Y"),
+            "V_jour": "",
+            "%nico": rng.uniform(0, 6, rows).round(2),
+            "L_eau": rng.uniform(0.5, 3, rows).round(1),
+            "T_coffee": rng.integers(0, 6, rows),
+            "L_bière": np.where(party, rng.uniform(0, 2, rows).round(1), 0.0),
+            "cl_alcool": np.where(party & (rng.random(rows) < 0.3), 4.0, np.nan),
+            "cl_vin": np.where(rng.random(rows) < 0.2, 12.5, 0.0),
+            "L_soda": rng.uniform(0, 1, rows).round(1),
+            "B_soiree": party.astype(int),
+            "N_soiree": np.where(party, "Soirée", None),
+            "V_debout": wake.round(4),
+            "V_couche": sleep,
+            "V_somm": ((wake - sleep) % 24).round(2),
+            "B_courrir": ran.astype(int),
+            "V_courrir": np.where(ran, rng.uniform(3, 15, rows).round(1), 0.0),
+            "V_poids": np.where(
+                rng.random(rows) < 0.7, (75 + rng.normal(0, 1.5, rows)).round(1), np.nan
+            ),
+        }
+    )
+
+
+def write_excel_csv(
+    path: Path, rows: int, seed: int = 0, sep: str = ";", decimal: str = ","
+) -> Path:
+    """Write a French Excel-style CSV export (``;`` separator, ``,`` decimals)."""
+    excel_frame(rows, seed=seed).to_csv(
+        path, sep=sep, decimal=decimal, index=False, encoding="utf-8-sig"
+    )
+    return path
+
+
+def write_excel_xlsx(path: Path, rows: int, seed: int = 0, sheet: str = "DB_DATA_SCADA") -> Path:
+    """Write ``excel_frame`` rows to a workbook with native date and time cells."""
+    from datetime import datetime, time
+
+    from openpyxl import Workbook
+
+    frame = excel_frame(rows, seed=seed)
+    workbook = Workbook(write_only=True)
+    workbook.create_sheet("Notes").append(["generated", rows, seed])
+    worksheet = workbook.create_sheet(sheet)
+    worksheet.append(list(frame.columns))
+
+    def clock(hours):
+        micros = round(float(hours) * 3_600_000_000) % 86_400_000_000
+        seconds, micro = divmod(micros, 1_000_000)
+        return time(seconds // 3600, seconds // 60 % 60, seconds % 60, micro)
+
+    for record in frame.itertuples(index=False):
+        cells = [None if isinstance(v, float) and np.isnan(v) else v for v in record]
+        cells[0] = datetime.strptime(cells[0], "%d/%m/%Y")
+        cells[11], cells[12] = clock(cells[11]), clock(cells[12])
+        worksheet.append([v.item() if isinstance(v, np.generic) else v for v in cells])
+    workbook.save(path)
+    return path
+
+
+def journal_frame(rows: int, start: date = date(2000, 1, 1), seed: int = 0) -> pd.DataFrame:
+    """Daily rows shaped like the ``journal`` table (ISO dates, ``HH:MM`` times)."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(start, periods=rows, freq="D")
+    wake = rng.normal(7.0, 0.6, rows).clip(4, 11)
+    sleep = rng.normal(23.3, 0.8, rows) % 24
+    party = rng.random(rows) < 0.12
+    ran = rng.random(rows) < 0.3
+
+    def hhmm(hours):
+        minutes = (hours * 60).round().astype(int) % (24 * 60)
+        return [f"{m // 60:02d}:{m % 60:02d}" for m in minutes]
+
+    return pd.DataFrame(
+        {
+            "date": days.strftime("%Y-%m-%d"),
+            "day_name": np.array(FRENCH_DAYS)[days.dayofweek],
+            "nico": rng.uniform(0, 6, rows).round(2),
+            "water_l": rng.uniform(0.5, 3, rows).round(1),
+            "coffee": rng.integers(0, 6, rows),
+            "beer_l": np.where(party, rng.uniform(0, 2, rows).round(1), 0.0),
+            "alcool_cl": np.where(party & (rng.random(rows) < 0.3), 4.0, 0.0),
+            "wine_cl": np.where(rng.random(rows) < 0.2, 12.5, 0.0),
+            "soda_l": rng.uniform(0, 1, rows).round(1),
+            "soiree": party.astype(int),
+            "soiree_name": np.where(party, "Soirée", None),
+            "wake_time": hhmm(wake),
+            "sleep_time": hhmm(sleep),
+            "sleep_hours": ((wake - sleep) % 24).round(2),
+            "ran": ran.astype(int),
+            "run_km": np.where(ran, rng.uniform(3, 15, rows).round(1), 0.0),
+            "weight": np.where(
+                rng.random(rows) < 0.7, (75 + rng.normal(0, 1.5, rows)).round(1), np.nan
+            ),
+        }
+    )
+
+
+def write_journal_db(rows: int, seed: int = 0, journal_id: int = 1) -> None:
+    """Fill a journal of the database at ``core.db.DB_PATH`` with ``journal_frame`` rows."""
+    from core.db import init_db, upsert_many
+
+    init_db()
+    upsert_many(journal_frame(rows, seed=seed), journal_id=journal_id)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import date
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .db import COLUMNS, STORAGE_TEXT_COLUMNS, TIME_COLUMNS
+
+
+ARCHIVE_COMPRESSION = "zstd"
+# Arrow types of the partition columns; the rest are float64 and ``date`` is
+# date32. Times are kept as ``HH:MM`` strings.
+ARCHIVE_STRING_COLUMNS = (*STORAGE_TEXT_COLUMNS, *TIME_COLUMNS)
+ARCHIVE_INT_COLUMNS = ("coffee", "soiree", "ran")
+
+
+def arrow_schema() -> pa.Schema:
+    """Typed Arrow schema for journal rows (``date`` as a real date)."""
+    types = {col: pa.float64() for col in COLUMNS}
+    types.update({col: pa.string() for col in ARCHIVE_STRING_COLUMNS})
+    types.update({col: pa.int64() for col in ARCHIVE_INT_COLUMNS})
+    types["date"] = pa.date32()
+    return pa.schema([(col, types[col]) for col in COLUMNS])
+
+
+def to_arrow(frame: pd.DataFrame) -> pa.Table:
+    """Convert journal rows with ISO string dates to an ``arrow_schema()`` table."""
+    schema = arrow_schema()
+    source = schema.set(0, pa.field("date", pa.string()))
+    table = pa.Table.from_pandas(frame[list(COLUMNS)], schema=source, preserve_index=False)
+    return table.cast(schema)
+
+
+def write_partition(path: Path, frame: pd.DataFrame) -> None:
+    """Write one year of rows to ``path``, one row group per month."""
+    frame = frame.sort_values("date")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with pq.ParquetWriter(tmp, arrow_schema(), compression=ARCHIVE_COMPRESSION) as writer:
+        for _, month in frame.groupby(frame["date"].str[:7], sort=True):
+            writer.write_table(to_arrow(month))
+    os.replace(tmp, path)
+
+
+def read_partition(
+    path: Path,
+    start: date | None = None,
+    end: date | None = None,
+    columns=None,
+    iso_dates: bool = False,
+) -> pd.DataFrame:
+    """Read ``date`` plus ``columns`` for ``start <= date <= end`` from a partition."""
+    columns = list(COLUMNS if columns is None else ["date", *columns])
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", start))
+    if end is not None:
+        filters.append(("date", "<=", end))
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    if iso_dates:
+        table = table.set_column(0, "date", table["date"].cast(pa.string()))
+    return table.to_pandas()
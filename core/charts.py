@@ -1,11 +1,146 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+import json
+import threading
+
 import altair as alt
+import numpy as np
 import pandas as pd
 
+from .profiling import count, profiled
+
+
+DEFAULT_CHART_WIDTH_PX = 900
+POINTS_PER_PIXEL = 1.0
+MIN_POINT_BUDGET = 50
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+DASHBOARD_DATASET = "journal"
+DARK_THEME = "bt_dark_theme"
+
+CHART_CACHE_SIZE = 64
+CHART_CACHE_STATS = {"hits": 0, "misses": 0}
+
+_CHART_CACHE: OrderedDict = OrderedDict()
+_CHART_CACHE_LOCK = threading.Lock()
+# Altair themes and data transformers are process-wide switches.
+_ALTAIR_LOCK = threading.Lock()
+
+
+@alt.theme.register(DARK_THEME, enable=False)
+def dark_theme() -> alt.theme.ThemeConfig:
+    return {
+        "config": {
+            "background": "#0f172a",
+            "view": {"fill": "#0f172a", "stroke": "transparent"},
+            "title": {"color": "#f8fafc"},
+            "axis": {
+                "labelColor": "#e2e8f0",
+                "titleColor": "#f8fafc",
+                "gridColor": "#1f2937",
+                "domainColor": "#94a3b8",
+            },
+            "legend": {"labelColor": "#e2e8f0", "titleColor": "#f8fafc"},
+            "range": {"category": ["#60a5fa", "#f472b6", "#34d399", "#facc15", "#a78bfa"]},
+        }
+    }
+
+
+def point_budget(width_px: int = DEFAULT_CHART_WIDTH_PX) -> int:
+    """Number of points worth sending for a chart ``width_px`` pixels wide."""
+    return max(MIN_POINT_BUDGET, int(width_px * POINTS_PER_PIXEL))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-triangle-three-buckets: indices of ``n_out`` representative points."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[: n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[: n - 1], edges[:-1]) / counts
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Keep the minimum and maximum of each bucket (plus both end points)."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    size = -(-n // ((n_out - 2) // 2))
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.nanargmin(padded, axis=1)
+    highs = offsets + np.nanargmax(padded, axis=1)
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
 
-def make_dynamic_line_chart(df: pd.DataFrame, y_col: str, y_label: str):
-    s = df[y_col].dropna()
+
+def downsample_series(s: pd.Series, max_points: int, method: str = "lttb") -> pd.Series:
+    """Reduce a date-indexed series to at most ~``max_points`` non-null points."""
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    s = s.dropna()
+    if len(s) <= max_points:
+        return s
+    y = s.to_numpy(dtype=float)
+    if method == "lttb":
+        x = pd.to_datetime(s.index).to_numpy().astype("datetime64[s]").astype(float)
+        idx = lttb_indices(x, y, max_points)
+    else:
+        idx = minmax_indices(y, max_points)
+    return s.iloc[idx]
+
+
+def _downsample_note(kept: int, total: int, method: str) -> str:
+    return f"↓ {kept:,} / {total:,} pts · {method.upper()}"
+
+
+def _titled(chart, title: str = "", note: str | None = None, **props):
+    """Set ``title`` (with the downsampling note as subtitle) and extra properties."""
+    if title:
+        subtitle = note if note is not None else alt.Undefined
+        props["title"] = alt.TitleParams(title, subtitle=subtitle, anchor="start")
+    elif note is not None:
+        props["title"] = alt.TitleParams("", subtitle=note, anchor="end")
+    return chart.properties(**props) if props else chart
+
+
+def _project(df: pd.DataFrame, cols, max_points: int | None, method: str):
+    """Keep only ``cols``, downsampling each independently; returns the frame and notes."""
+    frame = df[list(cols)].copy()
+    notes = {}
+    if max_points is not None:
+        for col in cols:
+            total = int(frame[col].notna().sum())
+            if total > max_points:
+                kept = downsample_series(frame[col], max_points, method)
+                frame[col] = kept.reindex(frame.index)
+                notes[col] = _downsample_note(len(kept), total, method)
+        if notes:
+            frame = frame.dropna(how="all")
+    return frame.rename_axis("date").reset_index(), notes
+
+
+def _dynamic_domain(s: pd.Series):
+    s = s.dropna()
     s = s[s != 0]
     if s.empty:
         return None
@@ -15,46 +150,34 @@ def make_dynamic_line_chart(df: pd.DataFrame, y_col: str, y_label: str):
         ymin -= 1
         ymax += 1
     padding = (ymax - ymin) * 0.1
-    domain = (ymin - padding, ymax + padding)
-    chart = (
-        alt.Chart(df.reset_index())
-        .mark_line()
-        .encode(
-            x=alt.X("date:T", title="Date"),
-            y=alt.Y(f"{y_col}:Q", title=y_label, scale=alt.Scale(domain=domain)),
-            tooltip=["date:T", alt.Tooltip(f"{y_col}:Q", title=y_label)],
-        )
-        .properties(height=300)
-    )
-    return chart
+    return (ymin - padding, ymax + padding)
 
 
-def make_basic_line_chart(df: pd.DataFrame, y_col: str, y_label: str):
-    s = df[y_col].dropna()
-    if s.empty:
-        return None
-    chart = (
-        alt.Chart(df.reset_index())
+def _line_chart(source, y_col: str, y_label: str, domain=None) -> alt.Chart:
+    scale = alt.Scale(domain=domain) if domain is not None else alt.Undefined
+    return (
+        alt.Chart(source)
+        .transform_filter(f"isValid(datum[{json.dumps(y_col)}])")
         .mark_line()
         .encode(
             x=alt.X("date:T", title="Date"),
-            y=alt.Y(f"{y_col}:Q", title=y_label),
+            y=alt.Y(f"{y_col}:Q", title=y_label, scale=scale),
             tooltip=["date:T", alt.Tooltip(f"{y_col}:Q", title=y_label)],
         )
         .properties(height=300)
     )
-    return chart
 
 
-def make_liquids_chart(df_sorted: pd.DataFrame, cols, label_map):
-    df_liquids = df_sorted[cols]
-    df_melt = df_liquids.reset_index().melt("date", var_name="type", value_name="value")
-    df_melt = df_melt.dropna(subset=["value"])
-    if df_melt.empty:
-        return None
-    df_melt["type"] = df_melt["type"].map(label_map)
-    chart = (
-        alt.Chart(df_melt)
+def _liquids_chart(source, cols, label_map) -> alt.Chart:
+    label_expr = "datum.type"
+    for col in reversed(list(cols)):
+        label = json.dumps(label_map.get(col, col))
+        label_expr = f"datum.type === {json.dumps(col)} ? {label} : ({label_expr})"
+    return (
+        alt.Chart(source)
+        .transform_fold(list(cols), as_=["type", "value"])
+        .transform_filter("isValid(datum.value)")
+        .transform_calculate(type=label_expr)
         .mark_line()
         .encode(
             x=alt.X("date:T", title="Date"),
@@ -64,5 +187,154 @@ def make_liquids_chart(df_sorted: pd.DataFrame, cols, label_map):
         )
         .properties(height=300)
     )
-    return chart
 
+
+@profiled("charts.make_dynamic_line_chart")
+def make_dynamic_line_chart(
+    df: pd.DataFrame,
+    y_col: str,
+    y_label: str,
+    max_points: int | None = None,
+    method: str = "lttb",
+):
+    domain = _dynamic_domain(df[y_col])
+    if domain is None:
+        return None
+    data, notes = _project(df, [y_col], max_points, method)
+    return _titled(_line_chart(data, y_col, y_label, domain), note=notes.get(y_col))
+
+
+@profiled("charts.make_basic_line_chart")
+def make_basic_line_chart(
+    df: pd.DataFrame,
+    y_col: str,
+    y_label: str,
+    max_points: int | None = None,
+    method: str = "lttb",
+):
+    if df[y_col].dropna().empty:
+        return None
+    data, notes = _project(df, [y_col], max_points, method)
+    return _titled(_line_chart(data, y_col, y_label), note=notes.get(y_col))
+
+
+@profiled("charts.make_liquids_chart")
+def make_liquids_chart(
+    df_sorted: pd.DataFrame,
+    cols,
+    label_map,
+    max_points: int | None = None,
+    method: str = "lttb",
+):
+    if df_sorted[list(cols)].dropna(how="all").empty:
+        return None
+    data, notes = _project(df_sorted, cols, max_points, method)
+    note = max(notes.values(), default=None)
+    return _titled(_liquids_chart(data, cols, label_map), note=note)
+
+
+def _message_chart(title: str, message: str, width: int) -> alt.Chart:
+    return (
+        alt.Chart(alt.Data(values=[{}]))
+        .mark_text(align="left", baseline="top", fontSize=13)
+        .encode(text=alt.value(message))
+        .properties(title=alt.TitleParams(title, anchor="start"), width=width, height=20)
+    )
+
+
+@profiled("charts.make_dashboard")
+def make_dashboard(
+    df: pd.DataFrame,
+    panels,
+    liquids: dict | None = None,
+    max_points: int | None = None,
+    method: str = "lttb",
+    width: int = DEFAULT_CHART_WIDTH_PX,
+):
+    """Stack every dashboard chart in one spec backed by one shared dataset."""
+    liquid_cols = list(liquids["columns"]) if liquids else []
+    cols = list(dict.fromkeys([p["column"] for p in panels] + liquid_cols))
+    if not cols:
+        return None
+    frame, notes = _project(df, cols, max_points, method)
+    source = alt.Data(name=DASHBOARD_DATASET)
+
+    charts = []
+    for panel in panels:
+        col = panel["column"]
+        domain = _dynamic_domain(df[col]) if panel.get("dynamic") else None
+        if df[col].dropna().empty or (panel.get("dynamic") and domain is None):
+            charts.append(_message_chart(panel["title"], panel["empty"], width))
+            continue
+        chart = _line_chart(source, col, panel["label"], domain)
+        charts.append(_titled(chart, panel["title"], notes.get(col), width=width))
+    if liquids:
+        if df[liquid_cols].dropna(how="all").empty:
+            charts.append(_message_chart(liquids["title"], liquids["empty"], width))
+        else:
+            note = max((notes[c] for c in liquid_cols if c in notes), default=None)
+            chart = _liquids_chart(source, liquid_cols, liquids["labels"])
+            charts.append(_titled(chart, liquids["title"], note, width=width))
+
+    records = frame.assign(date=frame["date"].astype(str))
+    records = records.astype(object).where(records.notna(), None).to_dict("records")
+    return alt.vconcat(*charts, spacing=36).properties(
+        datasets={DASHBOARD_DATASET: records}
+    )
+
+
+def spec_size(spec: dict | None) -> int:
+    """Size in bytes of ``spec`` as compact JSON, i.e. roughly what is shipped."""
+    if spec is None:
+        return 0
+    return len(json.dumps(spec, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+@profiled("charts.to_spec")
+def chart_to_spec(chart, theme: str = "default") -> dict:
+    """Serialise ``chart`` to a Vega-Lite dict under the given Altair theme."""
+    with _ALTAIR_LOCK:
+        with alt.theme.enable("none" if theme == "default" else theme):
+            with alt.data_transformers.enable("default", max_rows=None):
+                return chart.to_dict()
+
+
+def cached_chart_spec(
+    build,
+    *,
+    data_version,
+    columns,
+    date_range,
+    theme: str,
+    language: str,
+    extra=(),
+) -> dict | None:
+    """Return the Vega-Lite spec built by ``build()``, memoised in a bounded LRU."""
+    key = (data_version, tuple(columns), tuple(date_range), theme, language, tuple(extra))
+    with _CHART_CACHE_LOCK:
+        if key in _CHART_CACHE:
+            CHART_CACHE_STATS["hits"] += 1
+            count("chart_cache_hits", 1)
+            _CHART_CACHE.move_to_end(key)
+            return _CHART_CACHE[key]
+        CHART_CACHE_STATS["misses"] += 1
+        count("chart_cache_misses", 1)
+
+    chart = build()
+    spec = None if chart is None else chart_to_spec(chart, theme)
+    with _CHART_CACHE_LOCK:
+        _CHART_CACHE[key] = spec
+        _CHART_CACHE.move_to_end(key)
+        while len(_CHART_CACHE) > CHART_CACHE_SIZE:
+            _CHART_CACHE.popitem(last=False)
+    return spec
+
+
+def chart_cache_stats() -> dict:
+    with _CHART_CACHE_LOCK:
+        lookups = CHART_CACHE_STATS["hits"] + CHART_CACHE_STATS["misses"]
+        return {
+            **CHART_CACHE_STATS,
+            "size": len(_CHART_CACHE),
+            "hit_rate": CHART_CACHE_STATS["hits"] / lookups if lookups else 0.0,
+        }
@@ -1,64 +1,797 @@
 from __future__ import annotations
 
-from datetime import date, datetime, time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+import functools
+import hashlib
+import json
+import os
 from pathlib import Path
+import re
 import sqlite3
+import threading
+from typing import TYPE_CHECKING
 
-import pandas as pd
+from .profiling import count, profiled
+from .utils import hhmm_table
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DB_PATH = BASE_DIR / "data" / "journal_bt.db"
+DB_PATH = Path(os.environ.get("BT_DB_PATH") or BASE_DIR / "data" / "journal_bt.db")
 
+DEFAULT_JOURNAL_ID = 1
+DEFAULT_JOURNAL_NAME = "default"
+# Journal names are letters, digits, "-" and "_", up to JOURNAL_NAME_MAX long.
+JOURNAL_NAME_MAX = 40
+_JOURNAL_NAME = re.compile(rf"[\w-]{{1,{JOURNAL_NAME_MAX}}}")
 
-def get_conn() -> sqlite3.Connection:
-    """Return a SQLite connection, ensuring the data directory exists."""
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KIB = 16 * 1024
+MMAP_SIZE = 64 * 1024 * 1024
+POOL_MAX_IDLE = 4
 
+BULK_BATCH_SIZE = 500
+# Rows fetched per chunk when streaming the whole journal out (exports).
+EXPORT_CHUNK_ROWS = 5000
+# Parquet partitions of compacted years live in ``<db stem>.archive/`` next to
+# the database file, one directory per database.
+ARCHIVE_SUFFIX = ".archive"
+# Seconds a partition unreferenced by a restore is kept before it is pruned.
+ARCHIVE_PRUNE_GRACE_S = 60.0
+# Journals whose full dataset stays cached in memory (least recently used out).
+DATASET_CACHE_SIZE = 16
 
-def init_db() -> None:
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS journal (
-            date TEXT PRIMARY KEY,
-            day_name TEXT,
-            nico REAL,
-            water_l REAL,
-            coffee INT,
-            beer_l REAL,
-            alcool_cl REAL,
-            wine_cl REAL,
-            soda_l REAL,
-            soiree INTEGER,
-            soiree_name TEXT,
-            wake_time TEXT,
-            sleep_time TEXT,
-            sleep_hours REAL,
-            ran INTEGER,
-            run_km REAL,
-            weight REAL
+COLUMNS = (
+    "date",
+    "day_name",
+    "nico",
+    "water_l",
+    "coffee",
+    "beer_l",
+    "alcool_cl",
+    "wine_cl",
+    "soda_l",
+    "soiree",
+    "soiree_name",
+    "wake_time",
+    "sleep_time",
+    "sleep_hours",
+    "ran",
+    "run_km",
+    "weight",
+)
+
+# Dates are stored as day numbers since 1970-01-01 and wake/sleep times as
+# minutes since midnight; callers only ever see ``COLUMNS`` values.
+EPOCH = date(1970, 1, 1)
+TIME_COLUMNS = ("wake_time", "sleep_time")
+STORAGE_NAMES = {"date": "day", "wake_time": "wake_min", "sleep_time": "sleep_min"}
+STORAGE_COLUMNS = tuple(STORAGE_NAMES.get(c, c) for c in COLUMNS)
+
+_SELECT_COLUMNS = ", ".join(STORAGE_COLUMNS)
+
+# Storage columns holding text; every other one holds a number.
+STORAGE_TEXT_COLUMNS = ("day_name", "soiree_name")
+
+_UPSERT_SET = ", ".join(
+    f"{c} = excluded.{c}" for c in (*STORAGE_COLUMNS[1:], "row_hash", "row_version")
+)
+_UPSERT_SQL = f"""
+    INSERT INTO journal (journal_id, {_SELECT_COLUMNS}, row_hash, row_version)
+    VALUES (?, {", ".join("?" for _ in COLUMNS)}, ?, ?)
+    ON CONFLICT(journal_id, day) DO UPDATE SET {_UPSERT_SET}
+"""
+
+METRIC_COLUMNS = (
+    "nico",
+    "water_l",
+    "coffee",
+    "beer_l",
+    "alcool_cl",
+    "wine_cl",
+    "soda_l",
+    "soiree",
+    "sleep_hours",
+    "ran",
+    "run_km",
+    "weight",
+)
+
+# granularity -> (table, bucket start over day number {d}, next bucket start
+# over bucket {b}). Day 0 was a Thursday; the double modulo keeps days before
+# 1970 in the right week since SQLite's % truncates towards zero.
+ROLLUPS = {
+    "week": ("journal_weekly", "{d} - ((({d} + 3) % 7 + 7) % 7)", "{b} + 7"),
+    "month": (
+        "journal_monthly",
+        "CAST(strftime('%s', {d} * 86400, 'unixepoch', 'start of month') AS INTEGER) / 86400",
+        "CAST(strftime('%s', {b} * 86400, 'unixepoch', '+1 month') AS INTEGER) / 86400",
+    ),
+}
+ROLLUP_AGGREGATES = ("sum", "avg", "count")
+# Aggregate plotted for each metric when reading rollups: quantities add up
+# over a period, levels (weight, sleep, nicotine) are averaged.
+ROLLUP_DEFAULT_AGG = {
+    "nico": "avg",
+    "water_l": "sum",
+    "coffee": "sum",
+    "beer_l": "sum",
+    "alcool_cl": "sum",
+    "wine_cl": "sum",
+    "soda_l": "sum",
+    "soiree": "sum",
+    "sleep_hours": "avg",
+    "ran": "sum",
+    "run_km": "sum",
+    "weight": "avg",
+}
+
+CONN_STATS = {"opened": 0, "reused": 0}
+
+_POOLS: dict[tuple[str, bool], list[sqlite3.Connection]] = {}
+_POOL_LOCK = threading.Lock()
+_HELD = threading.local()
+
+CACHE_STATS = {"hits": 0, "misses": 0}
+
+_DATASET_CACHE: OrderedDict[tuple, dict] = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+# Database files already migrated by this process.
+_MIGRATED: set[str] = set()
+_MIGRATE_LOCK = threading.Lock()
+
+# Read snapshots open in this process, per database file.
+_SNAPSHOTS: dict[str, int] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+@profiled("db.connect")
+def _open_conn(path: Path, readonly: bool) -> sqlite3.Connection:
+    if readonly:
+        conn = sqlite3.connect(
+            f"{path.as_uri()}?mode=ro", uri=True, check_same_thread=False
         )
-        """
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    if readonly:
+        conn.execute("PRAGMA query_only=1")
+    return conn
+
+
+@contextmanager
+def get_conn(readonly: bool = False):
+    """Borrow a pooled SQLite connection; ``readonly=True`` opens a ``mode=ro`` one."""
+    key = (str(DB_PATH), readonly)
+    held = getattr(_HELD, "conns", None)
+    if held is None:
+        held = _HELD.conns = {}
+    if key in held:
+        with _POOL_LOCK:
+            CONN_STATS["reused"] += 1
+        yield held[key]
+        return
+
+    with _POOL_LOCK:
+        idle = _POOLS.setdefault(key, [])
+        conn = idle.pop() if idle else None
+        CONN_STATS["reused" if conn is not None else "opened"] += 1
+    if conn is None:
+        conn = _open_conn(DB_PATH, readonly)
+
+    held[key] = conn
+    try:
+        yield conn
+    finally:
+        del held[key]
+        if conn.in_transaction:
+            conn.rollback()
+        with _POOL_LOCK:
+            idle = _POOLS.setdefault(key, [])
+            if len(idle) < POOL_MAX_IDLE:
+                idle.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+
+def close_all() -> None:
+    """Close every idle pooled connection (e.g. before moving the DB file)."""
+    with _POOL_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for idle in pools:
+        for conn in idle:
+            conn.close()
+
+
+def connection_stats() -> dict:
+    with _POOL_LOCK:
+        return dict(CONN_STATS)
+
+
+def _current_version(conn: sqlite3.Connection, journal_id: int) -> int:
+    """Highest row version of ``journal_id``, archived years included."""
+    (current,) = conn.execute(
+        "SELECT MAX("
+        "COALESCE((SELECT MAX(row_version) FROM journal WHERE journal_id = ?), 0), "
+        "COALESCE((SELECT MAX(max_row_version) FROM journal_archive WHERE journal_id = ?), 0))",
+        (journal_id, journal_id),
+    ).fetchone()
+    return current
+
+
+def data_version(journal_id: int = DEFAULT_JOURNAL_ID) -> tuple:
+    """Token that changes whenever ``journal_id``'s data may have changed."""
+    if not DB_PATH.exists():
+        return (str(DB_PATH), journal_id, 0)
+    with get_conn(readonly=True) as conn:
+        return (str(DB_PATH), journal_id, _current_version(conn, journal_id))
+
+
+# Tables are STRICT where SQLite supports it (3.37+), so a value of the wrong
+# type is rejected instead of silently stored as text.
+_STRICT = "STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else ""
+_WITHOUT_ROWID = f"{_STRICT}, WITHOUT ROWID" if _STRICT else "WITHOUT ROWID"
+
+_MIGRATIONS_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL
+    ) {_STRICT}
+"""
+
+_JOURNALS_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS journals (
+        journal_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    ) {_STRICT}
+"""
+
+_JOURNAL_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS journal (
+        journal_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        day_name TEXT,
+        nico REAL,
+        water_l REAL,
+        coffee INTEGER,
+        beer_l REAL,
+        alcool_cl REAL,
+        wine_cl REAL,
+        soda_l REAL,
+        soiree INTEGER,
+        soiree_name TEXT,
+        wake_min INTEGER,
+        sleep_min INTEGER,
+        sleep_hours REAL,
+        ran INTEGER,
+        run_km REAL,
+        weight REAL,
+        row_version INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (journal_id, day)
+    ) {_WITHOUT_ROWID}
+"""
+
+_ARCHIVE_STALE_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS journal_archive_stale (
+        path TEXT PRIMARY KEY,
+        since REAL NOT NULL
+    ) {_WITHOUT_ROWID}
+"""
+
+_ARCHIVE_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS journal_archive (
+        journal_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        first_day INTEGER NOT NULL,
+        last_day INTEGER NOT NULL,
+        max_row_version INTEGER NOT NULL,
+        PRIMARY KEY (journal_id, year)
+    ) {_WITHOUT_ROWID}
+"""
+
+
+def _rollup_metrics() -> list[str]:
+    return [f"{m}_{agg}" for m in METRIC_COLUMNS for agg in ROLLUP_AGGREGATES]
+
+
+def _rollup_table_sql(table: str) -> str:
+    metrics = ", ".join(
+        f"{name} {'INTEGER' if name.endswith('_count') else 'REAL'}"
+        for name in _rollup_metrics()
+    )
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table} (journal_id INTEGER NOT NULL, "
+        f"bucket INTEGER NOT NULL, days INTEGER, {metrics}, "
+        f"PRIMARY KEY (journal_id, bucket)) {_WITHOUT_ROWID}"
+    )
+
+
+def _to_day(value) -> int:
+    """Day number of a ``date``/``datetime`` or ISO date string."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    elif isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def _from_day(day: int) -> date:
+    return EPOCH + timedelta(days=day)
+
+
+@functools.lru_cache(maxsize=4096)
+def _to_minutes(value) -> int | None:
+    """Minutes since midnight of a ``time`` or ``HH:MM`` string (``None`` if unset)."""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    if not isinstance(value, str) or ":" not in value:
+        return None
+    hours, _, minutes = value.partition(":")
+    try:
+        return (int(hours) * 60 + int(minutes[:2])) % 1440
+    except ValueError:
+        return None
+
+
+def _from_minutes(minutes: int | None) -> time | None:
+    return None if minutes is None else time(minutes // 60, minutes % 60)
+
+
+def _entry_params(data: dict) -> tuple:
+    """Storage tuple (``STORAGE_COLUMNS`` order) for one entry dict."""
+    return tuple(
+        _to_day(data["date"])
+        if c == "date"
+        else _to_minutes(data.get(c))
+        if c in TIME_COLUMNS
+        else data.get(c)
+        for c in COLUMNS
+    )
+
+
+_HASH_SEED = 0x9E3779B97F4A7C15
+_HASH_NULL = 0x7FF8DEADBEEF0001  # a NaN payload no float column ever stores
+
+
+@functools.lru_cache(maxsize=4096)
+def _text_hash(value) -> int:
+    if value is None or value != value:  # NaN is stored as NULL
+        return _HASH_NULL
+    digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _mix64(x):
+    """splitmix64 finaliser over a ``uint64`` array."""
+    import numpy as np
+
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _row_hashes(params: list[tuple]):
+    """Content hash of each storage tuple, day excluded, as an ``int64`` array."""
+    import numpy as np
+
+    hashes = np.full(len(params), _HASH_SEED, dtype="uint64")
+    if not params:
+        return hashes.view("int64")
+    columns = list(zip(*params))
+    for index, column in enumerate(STORAGE_COLUMNS[1:], start=1):
+        values = columns[index]
+        if column in STORAGE_TEXT_COLUMNS:
+            bits = np.fromiter(map(_text_hash, values), dtype="uint64", count=len(values))
+        else:
+            numbers = np.array(values, dtype="float64") + 0.0  # folds -0.0 into 0.0
+            bits = np.where(np.isnan(numbers), np.uint64(_HASH_NULL), numbers.view("uint64"))
+        hashes = _mix64(hashes ^ _mix64(bits ^ np.uint64(index)))
+    return hashes.view("int64")
+
+
+def _public_frame(df: pd.DataFrame, iso_dates: bool = False) -> pd.DataFrame:
+    """Turn storage columns read from SQL into ``COLUMNS`` values in place."""
+    import numpy as np
+
+    renames = {v: k for k, v in STORAGE_NAMES.items() if v in df.columns}
+    df = df.rename(columns=renames)
+    if df.empty:
+        return df
+    days = df["date"].to_numpy(dtype="int64").astype("datetime64[D]")
+    df["date"] = np.datetime_as_string(days).astype(object) if iso_dates else days.astype(object)
+    for col in TIME_COLUMNS:
+        if col in df.columns:
+            minutes = df[col]
+            valid = minutes.notna().to_numpy()
+            text = hhmm_table()[minutes.fillna(0).to_numpy(dtype="int64")]
+            df[col] = np.where(valid, text, None)
+    return df
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _sql_day(column: str) -> str:
+    return f"CAST(strftime('%s', {column}) AS INTEGER) / 86400"
+
+
+def _sql_minutes(column: str) -> str:
+    colon = f"instr({column}, ':')"
+    return (
+        f"CASE WHEN {colon} > 1 THEN (CAST(substr({column}, 1, {colon} - 1) AS INTEGER) * 60 "
+        f"+ CAST(substr({column}, {colon} + 1, 2) AS INTEGER)) % 1440 END"
+    )
+
+
+def _migrate_compact_layout(conn: sqlite3.Connection) -> bool:
+    """Migration 1: convert the original date-keyed ``journal`` table to the typed layout."""
+    legacy = bool(_table_columns(conn, "journal"))
+    if legacy:
+        conn.execute("ALTER TABLE journal RENAME TO journal_legacy")
+
+    conn.execute(_JOURNALS_TABLE_SQL)
+    conn.execute(_JOURNAL_TABLE_SQL)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_journal_row_version ON journal(journal_id, row_version)"
+    )
+    conn.execute(_ARCHIVE_TABLE_SQL)
+    for table, _, _ in ROLLUPS.values():
+        conn.execute(_rollup_table_sql(table))
+    if not legacy:
+        return False
+
+    values = {c: c for c in COLUMNS}
+    values["date"] = _sql_day("date")
+    for col in TIME_COLUMNS:
+        values[col] = _sql_minutes(col)
+    conn.execute(
+        f"INSERT INTO journal (journal_id, {_SELECT_COLUMNS}) "
+        f"SELECT {DEFAULT_JOURNAL_ID}, {', '.join(values[c] for c in COLUMNS)} FROM journal_legacy"
+    )
+    for table, expr, _ in ROLLUPS.values():
+        conn.execute(f"INSERT INTO {table} {_rollup_select(expr)} GROUP BY journal_id, bucket")
+    conn.execute("DROP TABLE journal_legacy")
+    return True
+
+
+def _migrate_row_hash(conn: sqlite3.Connection) -> bool:
+    """Migration 2: add ``journal.row_hash`` and fill it in for existing rows."""
+    conn.execute("ALTER TABLE journal ADD COLUMN row_hash INTEGER")
+    rows = conn.execute(f"SELECT journal_id, {_SELECT_COLUMNS} FROM journal").fetchall()
+    for start in range(0, len(rows), EXPORT_CHUNK_ROWS):
+        chunk = rows[start : start + EXPORT_CHUNK_ROWS]
+        hashes = _row_hashes([row[1:] for row in chunk]).tolist()
+        conn.executemany(
+            "UPDATE journal SET row_hash = ? WHERE journal_id = ? AND day = ?",
+            [(h, row[0], row[1]) for h, row in zip(hashes, chunk)],
+        )
+    return False
+
+
+def _migrate_archive_stale(conn: sqlite3.Connection) -> bool:
+    """Migration 3: track partition files a restore has unreferenced."""
+    conn.execute(_ARCHIVE_STALE_TABLE_SQL)
+    return False
+
+
+# (version, name, migration). Migrations run in order inside one write
+# transaction and are recorded in ``schema_migrations``; append, never edit.
+MIGRATIONS = (
+    (1, "compact_typed_layout", _migrate_compact_layout),
+    (2, "row_hash", _migrate_row_hash),
+    (3, "archive_stale", _migrate_archive_stale),
+)
+
+
+def _run_migrations(conn: sqlite3.Connection) -> bool:
+    """Apply pending ``MIGRATIONS``; returns whether any of them moved data."""
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute(_MIGRATIONS_TABLE_SQL)
+    applied = {version for (version,) in conn.execute("SELECT version FROM schema_migrations")}
+    moved = False
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        moved |= bool(migrate(conn))
+        conn.execute(
+            "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+            (version, name, datetime.now().isoformat(timespec="seconds")),
+        )
+    conn.execute(
+        "INSERT OR IGNORE INTO journals (journal_id, name) VALUES (?, ?)",
+        (DEFAULT_JOURNAL_ID, DEFAULT_JOURNAL_NAME),
     )
     conn.commit()
-    conn.close()
+    return moved
+
+
+@profiled("db.init_db")
+def init_db() -> None:
+    """Bring the database at ``DB_PATH`` to the latest schema, once per process."""
+    key = str(DB_PATH)
+    if key in _MIGRATED and DB_PATH.exists():
+        return
+    with _MIGRATE_LOCK:
+        with get_conn() as conn:
+            if _run_migrations(conn):
+                conn.execute("VACUUM")
+        _MIGRATED.add(key)
 
 
-def load_entry(d: date):
+def schema_version() -> int:
+    """Highest migration applied to the database at ``DB_PATH``."""
+    with get_conn(readonly=True) as conn:
+        (version,) = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return version or 0
+
+
+def journal_id_for(name: str, create: bool = True) -> int | None:
+    """Id of the journal called ``name``, creating it unless ``create`` is false."""
+    with get_conn(readonly=True) as conn:
+        row = conn.execute("SELECT journal_id FROM journals WHERE name = ?", (name,)).fetchone()
+    if row is not None or not create:
+        return row[0] if row else None
+    if not valid_journal_name(name):
+        raise ValueError(f"Invalid journal name: {name!r}")
+    with get_conn() as conn:
+        conn.execute("INSERT OR IGNORE INTO journals (name) VALUES (?)", (name,))
+        conn.commit()
+        (journal_id,) = conn.execute(
+            "SELECT journal_id FROM journals WHERE name = ?", (name,)
+        ).fetchone()
+    return journal_id
+
+
+def valid_journal_name(name: str) -> bool:
+    return _JOURNAL_NAME.fullmatch(name) is not None
+
+
+def list_journals() -> list[tuple[int, str]]:
+    with get_conn(readonly=True) as conn:
+        return conn.execute("SELECT journal_id, name FROM journals ORDER BY journal_id").fetchall()
+
+
+def _rollup_select(expr: str) -> str:
+    metrics = ", ".join(
+        f"{agg.upper()}({m})" for m in METRIC_COLUMNS for agg in ROLLUP_AGGREGATES
+    )
+    return (
+        f"SELECT journal_id, {expr.format(d='day')} AS bucket, COUNT(*), {metrics} "
+        "FROM journal"
+    )
+
+
+def _refresh_rollups(conn: sqlite3.Connection, journal_id: int, days: list[int]) -> None:
+    """Recompute ``journal_id``'s weekly/monthly buckets containing ``days``."""
+    touched = json.dumps(days)
+    for table, expr, next_bucket in ROLLUPS.values():
+        buckets = f"SELECT DISTINCT {expr.format(d='value')} AS b FROM json_each(?)"
+        conn.execute(
+            f"DELETE FROM {table} WHERE journal_id = ? AND bucket IN ({buckets})",
+            (journal_id, touched),
+        )
+        conn.execute(
+            f"""
+            INSERT INTO {table} {_rollup_select(expr)}
+            WHERE journal_id = ?
+              AND day >= (SELECT MIN(b) FROM ({buckets}))
+              AND day < (SELECT {next_bucket.format(b='MAX(b)')} FROM ({buckets}))
+              AND {expr.format(d='day')} IN ({buckets})
+            GROUP BY journal_id, bucket
+            """,
+            (journal_id, touched, touched, touched),
+        )
+
+
+def archive_dir() -> Path:
+    """Directory holding the partitions of the database at ``DB_PATH``."""
+    return DB_PATH.with_name(DB_PATH.stem + ARCHIVE_SUFFIX)
+
+
+@contextmanager
+def _snapshot(conn: sqlite3.Connection):
+    """Keep one read transaction open so the table and archive catalog agree."""
+    if conn.in_transaction:
+        yield
+        return
+    key = str(DB_PATH)
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS[key] = _SNAPSHOTS.get(key, 0) + 1
+    try:
+        conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            conn.rollback()
+    finally:
+        with _SNAPSHOTS_LOCK:
+            _SNAPSHOTS[key] -= 1
+
+
+def _archive_frames(
+    conn: sqlite3.Connection,
+    journal_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    columns=None,
+) -> list[pd.DataFrame]:
+    """Read ``journal_id``'s archived years overlapping ``[start, end]``, one frame each."""
+    clauses, params = ["journal_id = ?"], [journal_id]
+    if start is not None:
+        clauses.append("last_day >= ?")
+        params.append(_to_day(start))
+    if end is not None:
+        clauses.append("first_day <= ?")
+        params.append(_to_day(end))
+    where = f"WHERE {' AND '.join(clauses)}"
+    paths = conn.execute(f"SELECT path FROM journal_archive {where} ORDER BY year", params)
+    paths = [archive_dir() / path for (path,) in paths]
+    if not paths:
+        return []
+
+    from .archive import read_partition
+
+    return [read_partition(path, start, end, columns) for path in paths]
+
+
+def _archived_row(conn: sqlite3.Connection, journal_id: int, d: date) -> tuple | None:
+    """Storage tuple for ``d`` from the archive, shaped like a ``journal`` select."""
+    part = conn.execute(
+        "SELECT path FROM journal_archive WHERE journal_id = ? AND year = ?",
+        (journal_id, d.year),
+    ).fetchone()
+    if part is None:
+        return None
+
+    from .archive import read_partition
+
+    frame = read_partition(archive_dir() / part[0], d, d, iso_dates=True)
+    return _storage_params(frame)[0] if not frame.empty else None
+
+
+def _combine(hot: pd.DataFrame, archived: list[pd.DataFrame]) -> pd.DataFrame:
+    import pandas as pd
+
+    frames = [f for f in (hot, *archived) if not f.empty]
+    if len(frames) < 2:
+        return frames[0] if frames else hot
+    return pd.concat(frames, ignore_index=True).sort_values("date", ignore_index=True)
+
+
+def _years_touched(days: list[int]) -> set[int]:
+    """Years holding rows of the rollup buckets around ``days``."""
+    years = set()
+    for value in set(days):
+        day = _from_day(value)
+        monday = day - timedelta(days=day.weekday())
+        years.update((monday.year, (monday + timedelta(days=6)).year))
+    return years
+
+
+def _restore_archived(
+    conn: sqlite3.Connection, journal_id: int, days: list[int], version: int
+) -> None:
+    """Move archived years touched by a write back into the ``journal`` table."""
+    archived = dict(
+        conn.execute(
+            "SELECT year, path FROM journal_archive WHERE journal_id = ?", (journal_id,)
+        ).fetchall()
+    )
+    if not archived:
+        return
+    years = _years_touched(days) & archived.keys()
+    if not years:
+        return
+
+    from .archive import read_partition
+
+    for year in sorted(years):
+        params = _storage_params(read_partition(archive_dir() / archived[year], iso_dates=True))
+        hashes = _row_hashes(params).tolist()
+        conn.executemany(
+            _UPSERT_SQL, [(journal_id, *p, h, version) for p, h in zip(params, hashes)]
+        )
+        conn.execute(
+            "DELETE FROM journal_archive WHERE journal_id = ? AND year = ?", (journal_id, year)
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO journal_archive_stale (path, since) VALUES (?, ?)",
+            (archived[year], datetime.now().timestamp()),
+        )
+
+
+def _prune_archive(conn: sqlite3.Connection) -> None:
+    """Delete the stale partition files no open snapshot can still be reading."""
+    with _SNAPSHOTS_LOCK:
+        if _SNAPSHOTS.get(str(DB_PATH)):
+            return
+        stale = conn.execute(
+            "SELECT path FROM journal_archive_stale WHERE since <= ? "
+            "AND path NOT IN (SELECT path FROM journal_archive)",
+            (datetime.now().timestamp() - ARCHIVE_PRUNE_GRACE_S,),
+        ).fetchall()
+        for (path,) in stale:
+            (archive_dir() / path).unlink(missing_ok=True)
+            conn.execute("DELETE FROM journal_archive_stale WHERE path = ?", (path,))
+
+
+@profiled("db.compact_archive")
+def compact_archive(
+    before_year: int | None = None, journal_id: int = DEFAULT_JOURNAL_ID
+) -> list[int]:
+    """Move ``journal_id``'s years before ``before_year`` to Parquet partitions."""
+    import pandas as pd
+
+    from .archive import write_partition
+
+    if before_year is None:
+        before_year = date.today().year
+    archived = []
+    with get_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        years = conn.execute(
+            "SELECT DISTINCT CAST(strftime('%Y', day * 86400, 'unixepoch') AS INTEGER) "
+            "FROM journal WHERE journal_id = ? AND day < ? ORDER BY 1",
+            (journal_id, _to_day(date(before_year, 1, 1))),
+        ).fetchall()
+        for (year,) in years:
+            bounds = (journal_id, _to_day(date(year, 1, 1)), _to_day(date(year + 1, 1, 1)))
+            rows = conn.execute(
+                f"SELECT {_SELECT_COLUMNS}, row_version FROM journal "
+                "WHERE journal_id = ? AND day >= ? AND day < ?",
+                bounds,
+            ).fetchall()
+            frame = pd.DataFrame.from_records(rows, columns=[*STORAGE_COLUMNS, "row_version"])
+            first_day, last_day = int(frame["day"].min()), int(frame["day"].max())
+            max_version = int(frame["row_version"].max())
+            path = f"journal={journal_id}/year={year}/part-v{max_version}.parquet"
+            write_partition(archive_dir() / path, _public_frame(frame, iso_dates=True))
+            conn.execute(
+                "DELETE FROM journal WHERE journal_id = ? AND day >= ? AND day < ?", bounds
+            )
+            conn.execute(
+                "INSERT INTO journal_archive "
+                "(journal_id, year, path, rows, first_day, last_day, max_row_version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (journal_id, year, path, len(frame), first_day, last_day, max_version),
+            )
+            archived.append(year)
+        _prune_archive(conn)
+        conn.commit()
+    return archived
+
+
+@profiled("db.load_entry")
+def load_entry(d: date, journal_id: int = DEFAULT_JOURNAL_ID):
     """Load a single entry, returning convenient python types for the UI."""
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute("SELECT * FROM journal WHERE date = ?", (d.isoformat(),))
-    row = c.fetchone()
-    conn.close()
+    with get_conn(readonly=True) as conn, _snapshot(conn):
+        row = conn.execute(
+            f"SELECT {_SELECT_COLUMNS} FROM journal WHERE journal_id = ? AND day = ?",
+            (journal_id, _to_day(d)),
+        ).fetchone() or _archived_row(conn, journal_id, d)
     if not row:
         return None
+    count("rows_read", 1)
 
     (
-        date_str,
+        day,
         day_name,
         nico,
         water_l,
@@ -69,24 +802,16 @@ def load_entry(d: date):
         soda_l,
         soiree,
         soiree_name,
-        wake_time,
-        sleep_time,
+        wake_min,
+        sleep_min,
         sleep_hours,
         ran,
         run_km,
         weight,
     ) = row
 
-    def parse_time(value: str | None) -> time | None:
-        if value is None:
-            return None
-        try:
-            return datetime.strptime(value, "%H:%M").time()
-        except Exception:
-            return None
-
     return {
-        "date": datetime.fromisoformat(date_str).date(),
+        "date": _from_day(day),
         "day_name": day_name,
         "nico": nico,
         "water_l": water_l,
@@ -97,8 +822,8 @@ def load_entry(d: date):
         "soda_l": soda_l,
         "soiree": bool(soiree),
         "soiree_name": soiree_name,
-        "wake_time": parse_time(wake_time),
-        "sleep_time": parse_time(sleep_time),
+        "wake_time": _from_minutes(wake_min),
+        "sleep_time": _from_minutes(sleep_min),
         "sleep_hours": sleep_hours,
         "ran": bool(ran),
         "run_km": run_km,
@@ -106,53 +831,437 @@ def load_entry(d: date):
     }
 
 
-def upsert_entry(data: dict) -> None:
-    conn = get_conn()
-    c = conn.cursor()
-    c.execute(
-        """
-        INSERT INTO journal (
-            date, day_name, nico, water_l, coffee, beer_l,
-            alcool_cl, wine_cl, soda_l,
-            soiree, soiree_name,
-            wake_time, sleep_time, sleep_hours,
-            ran, run_km, weight
-        ) VALUES (
-            :date, :day_name, :nico, :water_l, :coffee, :beer_l,
-            :alcool_cl, :wine_cl, :soda_l,
-            :soiree, :soiree_name,
-            :wake_time, :sleep_time, :sleep_hours,
-            :ran, :run_km, :weight
+def _next_row_version(conn: sqlite3.Connection, journal_id: int) -> int:
+    """Row version for the current write transaction, archived years included."""
+    return _current_version(conn, journal_id) + 1
+
+
+@profiled("db.upsert_entry")
+def upsert_entry(data: dict, journal_id: int = DEFAULT_JOURNAL_ID, wait: bool = True):
+    """Save one entry through the writer queue; ``wait=False`` returns its future."""
+    from .writer import submit_rows
+
+    future = submit_rows([_entry_params(data)], journal_id)
+    if not wait:
+        return future
+    future.result()
+    return None
+
+
+def _storage_params(frame: pd.DataFrame) -> list[tuple]:
+    """Build executemany storage tuples (``STORAGE_COLUMNS`` order) column by column."""
+    import pandas as pd
+
+    columns = []
+    for c in COLUMNS:
+        if c not in frame.columns:
+            columns.append([None] * len(frame))
+            continue
+        s = frame[c]
+        if c == "date":
+            days = pd.to_datetime(s).to_numpy().astype("datetime64[D]").astype("int64")
+            columns.append(days.tolist())
+        elif c in TIME_COLUMNS:
+            columns.append([_to_minutes(v) for v in s.tolist()])
+        else:
+            columns.append(s.astype(object).where(s.notna(), None).tolist())
+    return list(zip(*columns))
+
+
+def _unique_params(rows) -> list[tuple]:
+    """Storage tuples of a DataFrame or entry dicts, keeping the last row of each date."""
+    import pandas as pd
+
+    frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+    if frame.empty:
+        return []
+    return list({p[0]: p for p in _storage_params(frame)}.values())
+
+
+@profiled("db.upsert_many")
+def upsert_many(
+    rows,
+    batch_size: int = BULK_BATCH_SIZE,
+    journal_id: int = DEFAULT_JOURNAL_ID,
+    wait: bool = True,
+):
+    """Upsert a DataFrame (or list of entry dicts), returning the write counts."""
+    from .writer import submit_rows
+
+    future = submit_rows(_unique_params(rows), journal_id, batch_size)
+    return future.result() if wait else future
+
+
+def _same_value(column: str, old, new) -> bool:
+    """Whether two storage values are equal the way ``_row_hashes`` sees them."""
+    if old is None or new is None or old != old or new != new:
+        return (old is None or old != old) and (new is None or new != new)
+    if column in STORAGE_TEXT_COLUMNS:
+        return str(old) == str(new)
+    return float(old) == float(new)
+
+
+@profiled("db.diff_rows")
+def diff_rows(rows, journal_id: int = DEFAULT_JOURNAL_ID) -> dict:
+    """Dry run of ``upsert_many``: counts, ``new_dates`` and a ``changes`` frame."""
+    import numpy as np
+    import pandas as pd
+
+    params = _unique_params(rows)
+    with get_conn(readonly=True) as conn, _snapshot(conn):
+        hashes = _row_hashes(params)
+        found, same = _compare_rows(conn, journal_id, params, hashes)
+        updated = [params[i] for i in np.flatnonzero(found & ~same).tolist()]
+        days = json.dumps([p[0] for p in updated])
+        old = {
+            row[0]: row
+            for row in conn.execute(
+                f"SELECT {_SELECT_COLUMNS} FROM journal "
+                "WHERE journal_id = ? AND day IN (SELECT value FROM json_each(?))",
+                (journal_id, days),
+            )
+        }
+        missing = [p[0] for p in updated if p[0] not in old]
+        old.update((p[0], p) for p in _archived_params(conn, journal_id, missing))
+
+    def shown(column, value):
+        if column in TIME_COLUMNS and value is not None:
+            return str(hhmm_table()[value])
+        return value
+
+    changes = [
+        (_from_day(p[0]), column, shown(column, old[p[0]][i]), shown(column, p[i]))
+        for p in updated
+        for i, column in enumerate(COLUMNS[1:], start=1)
+        if not _same_value(column, old[p[0]][i], p[i])
+    ]
+    unchanged = int(same.sum())
+    return {
+        "inserted": len(params) - len(updated) - unchanged,
+        "updated": len(updated),
+        "unchanged": unchanged,
+        "new_dates": [_from_day(params[i][0]) for i in np.flatnonzero(~found).tolist()],
+        "changes": pd.DataFrame(changes, columns=["date", "column", "old", "new"]),
+    }
+
+
+def _archived_params(conn: sqlite3.Connection, journal_id: int, days: list[int]) -> list[tuple]:
+    """Storage tuples of ``journal_id``'s archived rows among ``days``."""
+    years = {_from_day(d).year for d in days}
+    paths = [
+        path
+        for year, path in conn.execute(
+            "SELECT year, path FROM journal_archive WHERE journal_id = ?", (journal_id,)
         )
-        ON CONFLICT(date) DO UPDATE SET
-            day_name = excluded.day_name,
-            nico = excluded.nico,
-            water_l = excluded.water_l,
-            coffee = excluded.coffee,
-            beer_l = excluded.beer_l,
-            alcool_cl = excluded.alcool_cl,
-            wine_cl = excluded.wine_cl,
-            soda_l = excluded.soda_l,
-            soiree = excluded.soiree,
-            soiree_name = excluded.soiree_name,
-            wake_time = excluded.wake_time,
-            sleep_time = excluded.sleep_time,
-            sleep_hours = excluded.sleep_hours,
-            ran = excluded.ran,
-            run_km = excluded.run_km,
-            weight = excluded.weight
-        """,
-        data,
+        if year in years
+    ]
+    if not paths:
+        return []
+
+    from .archive import read_partition
+
+    wanted, params = set(days), []
+    first, last = _from_day(min(days)), _from_day(max(days))
+    for path in paths:
+        frame = read_partition(archive_dir() / path, first, last, iso_dates=True)
+        params += [p for p in _storage_params(frame) if p[0] in wanted]
+    return params
+
+
+def _compare_rows(conn: sqlite3.Connection, journal_id: int, params: list[tuple], hashes):
+    """Whether each storage tuple's day is stored, and whether its hash matches."""
+    import numpy as np
+
+    days = np.array([p[0] for p in params], dtype="int64")
+    rows = conn.execute(
+        "SELECT day, row_hash IS NOT NULL, IFNULL(row_hash, 0) FROM journal "
+        "WHERE journal_id = ? AND day IN (SELECT value FROM json_each(?))",
+        (journal_id, json.dumps(days.tolist())),
+    ).fetchall()
+    missing = np.setdiff1d(days, [row[0] for row in rows]).tolist()
+    archived = _archived_params(conn, journal_id, missing) if missing else []
+    rows += [(p[0], 1, h) for p, h in zip(archived, _row_hashes(archived).tolist())]
+    if not rows:
+        return np.zeros(len(days), dtype=bool), np.zeros(len(days), dtype=bool)
+
+    stored = np.array(rows, dtype="int64")
+    stored = stored[np.argsort(stored[:, 0])]
+    match = np.searchsorted(stored[:, 0], days).clip(max=len(stored) - 1)
+    found = stored[match, 0] == days
+    same = found & (stored[match, 1] == 1) & (stored[match, 2] == hashes)
+    return found, same
+
+
+def _write_rows(
+    conn: sqlite3.Connection,
+    journal_id: int,
+    params: list[tuple],
+    version: int,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> tuple[dict, list[int]]:
+    """Upsert changed storage tuples at ``version``; returns the counts and days written."""
+    import numpy as np
+
+    hashes = _row_hashes(params)
+    found, same = _compare_rows(conn, journal_id, params, hashes)
+    write = np.flatnonzero(~same).tolist()
+    hashes = hashes.tolist()
+    days = [params[i][0] for i in write]
+    _restore_archived(conn, journal_id, days, version)
+    rows = [(journal_id, *params[i], hashes[i], version) for i in write]
+    for start in range(0, len(rows), batch_size):
+        conn.executemany(_UPSERT_SQL, rows[start : start + batch_size])
+    unchanged = int(same.sum())
+    updated = int(found.sum()) - unchanged
+    inserted = len(params) - updated - unchanged
+    return {"inserted": inserted, "updated": updated, "unchanged": unchanged}, days
+
+
+def _read_rows(
+    conn: sqlite3.Connection,
+    journal_id: int,
+    where: str = "",
+    params=(),
+    order_by: str = "ORDER BY day",
+) -> pd.DataFrame:
+    """Read ``journal_id``'s rows; ``where`` adds ``AND ...`` conditions on storage columns."""
+    import pandas as pd
+
+    df = pd.read_sql_query(
+        f"SELECT {_SELECT_COLUMNS}, row_version FROM journal "
+        f"WHERE journal_id = ? {where} {order_by}",
+        conn,
+        params=(journal_id, *params),
     )
-    conn.commit()
-    conn.close()
+    count("rows_read", len(df))
+    return _public_frame(df)
 
 
-def load_all() -> pd.DataFrame:
-    conn = get_conn()
-    df = pd.read_sql_query("SELECT * FROM journal ORDER BY date", conn)
-    conn.close()
-    if not df.empty:
-        df["date"] = pd.to_datetime(df["date"]).dt.date
-    return df
+def _read_all(conn: sqlite3.Connection, journal_id: int) -> pd.DataFrame:
+    """Hot rows plus every archived year of ``journal_id``, in date order."""
+    archived = [f.assign(row_version=0) for f in _archive_frames(conn, journal_id)]
+    count("rows_read", sum(len(f) for f in archived))
+    return _combine(_read_rows(conn, journal_id), archived)
+
+
+@profiled("db.load_all")
+def load_all(journal_id: int = DEFAULT_JOURNAL_ID) -> pd.DataFrame:
+    with get_conn(readonly=True) as conn, _snapshot(conn):
+        return _read_all(conn, journal_id).drop(columns="row_version")
+
+
+def iter_chunks(chunk_rows: int = EXPORT_CHUNK_ROWS, journal_id: int = DEFAULT_JOURNAL_ID):
+    """Yield the journal in date order as DataFrames of at most ``chunk_rows`` rows."""
+    import pandas as pd
+
+    with get_conn(readonly=True) as conn, _snapshot(conn):
+        archived = conn.execute(
+            "SELECT year, path FROM journal_archive WHERE journal_id = ? ORDER BY year",
+            (journal_id,),
+        ).fetchall()
+        lower = None
+        # Hot rows and archived years never share a year, so the output is the
+        # hot rows between archived years interleaved with those partitions.
+        for year, path in [*archived, (None, None)]:
+            clauses, params = ["journal_id = ?"], [journal_id]
+            if lower is not None:
+                clauses.append("day >= ?")
+                params.append(lower)
+            if year is not None:
+                clauses.append("day < ?")
+                params.append(_to_day(date(year, 1, 1)))
+            cursor = conn.execute(
+                f"SELECT {_SELECT_COLUMNS} FROM journal WHERE {' AND '.join(clauses)} "
+                "ORDER BY day",
+                params,
+            )
+            while rows := cursor.fetchmany(chunk_rows):
+                chunk = pd.DataFrame.from_records(rows, columns=STORAGE_COLUMNS)
+                yield _public_frame(chunk, iso_dates=True)
+            if year is not None:
+                from .archive import read_partition
+
+                yield read_partition(archive_dir() / path, iso_dates=True)
+                lower = _to_day(date(year + 1, 1, 1))
+
+
+def _merge_delta(frame: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """Apply changed rows to the date-indexed cached frame in place."""
+    import pandas as pd
+
+    delta = delta.set_index(delta["date"].rename(None)).sort_index()
+    known = delta.index.isin(frame.index)
+    if known.any():
+        rows = frame.index.get_indexer(delta.index[known])
+        for col in delta.columns:
+            values = delta[col][known]
+            if values.dtype != frame[col].dtype:
+                try:
+                    values = values.astype(frame[col].dtype)
+                except (TypeError, ValueError):
+                    frame[col] = frame[col].astype(object)
+            frame.iloc[rows, frame.columns.get_loc(col)] = values.to_numpy()
+    if not known.all():
+        fresh = delta[~known]
+        needs_sort = not frame.empty and fresh.index.min() < frame.index[-1]
+        frame = pd.concat([frame, fresh]) if not frame.empty else fresh
+        if needs_sort:
+            frame = frame.sort_index()
+    return frame
+
+
+@profiled("db.date_bounds")
+def date_bounds(journal_id: int = DEFAULT_JOURNAL_ID) -> tuple[date, date] | None:
+    """First and last journal dates (index lookups), or ``None`` when empty."""
+    with get_conn(readonly=True) as conn:
+        first, last = conn.execute(
+            "SELECT MIN(d), MAX(d) FROM ("
+            "SELECT MIN(day) AS d FROM journal WHERE journal_id = :j "
+            "UNION ALL SELECT MAX(day) FROM journal WHERE journal_id = :j "
+            "UNION ALL SELECT MIN(first_day) FROM journal_archive WHERE journal_id = :j "
+            "UNION ALL SELECT MAX(last_day) FROM journal_archive WHERE journal_id = :j)",
+            {"j": journal_id},
+        ).fetchone()
+    if first is None:
+        return None
+    return _from_day(first), _from_day(last)
+
+
+@profiled("db.load_range")
+def load_range(
+    start: date | None = None,
+    end: date | None = None,
+    columns=None,
+    journal_id: int = DEFAULT_JOURNAL_ID,
+) -> pd.DataFrame:
+    """Load ``date`` plus ``columns`` for ``start <= date <= end``."""
+    import pandas as pd
+
+    columns = [c for c in (COLUMNS if columns is None else columns) if c != "date"]
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown journal columns: {sorted(unknown)}")
+
+    clauses, params = ["journal_id = ?"], [journal_id]
+    if start is not None:
+        clauses.append("day >= ?")
+        params.append(_to_day(start))
+    if end is not None:
+        clauses.append("day <= ?")
+        params.append(_to_day(end))
+    where = f"WHERE {' AND '.join(clauses)}"
+    select = ", ".join(STORAGE_NAMES.get(c, c) for c in ["date", *columns])
+
+    with get_conn(readonly=True) as conn, _snapshot(conn):
+        df = pd.read_sql_query(
+            f"SELECT {select} FROM journal {where} ORDER BY day", conn, params=params
+        )
+        archived = _archive_frames(conn, journal_id, start, end, columns)
+    count("rows_read", len(df) + sum(len(f) for f in archived))
+    return _combine(_public_frame(df), archived)
+
+
+@profiled("db.load_rollup")
+def load_rollup(
+    granularity: str,
+    start: date | None = None,
+    end: date | None = None,
+    columns=None,
+    agg: dict | None = None,
+    journal_id: int = DEFAULT_JOURNAL_ID,
+) -> pd.DataFrame:
+    """Load weekly or monthly aggregates shaped like ``load_range`` output."""
+    import pandas as pd
+
+    if granularity not in ROLLUPS:
+        raise ValueError(f"Unknown rollup granularity: {granularity}")
+    table, expr, _ = ROLLUPS[granularity]
+    columns = [c for c in (METRIC_COLUMNS if columns is None else columns) if c != "date"]
+    unknown = set(columns) - set(METRIC_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown journal metrics: {sorted(unknown)}")
+    agg = {**ROLLUP_DEFAULT_AGG, **(agg or {})}
+    if set(agg[c] for c in columns) - set(ROLLUP_AGGREGATES):
+        raise ValueError(f"Aggregates must be one of {ROLLUP_AGGREGATES}")
+
+    clauses, params = ["journal_id = ?"], [journal_id]
+    if start is not None:
+        clauses.append(f"bucket >= (SELECT {expr.format(d='v')} FROM (SELECT ? AS v))")
+        params.append(_to_day(start))
+    if end is not None:
+        clauses.append("bucket <= ?")
+        params.append(_to_day(end))
+    where = f"WHERE {' AND '.join(clauses)}"
+    select = ", ".join(["bucket AS day"] + [f"{c}_{agg[c]} AS {c}" for c in columns])
+
+    with get_conn(readonly=True) as conn:
+        df = pd.read_sql_query(
+            f"SELECT {select} FROM {table} {where} ORDER BY bucket", conn, params=params
+        )
+    count("rows_read", len(df))
+    return _public_frame(df)
+
+
+@profiled("db.load_all_cached")
+def load_all_cached(journal_id: int = DEFAULT_JOURNAL_ID) -> pd.DataFrame:
+    """``load_all`` memoised on ``data_version()``, refreshed with changed rows only."""
+    import pandas as pd
+
+    key = (str(DB_PATH), journal_id)
+    with _CACHE_LOCK:
+        cache = _DATASET_CACHE.get(key)
+        base = cache["watermark"] if cache is not None else None
+
+    with get_conn(readonly=True) as conn, _snapshot(conn):
+        version = data_version(journal_id)
+        hit = cache is not None and cache["version"] == version
+        if hit:
+            rows = None
+        elif cache is None:
+            rows = _read_all(conn, journal_id).drop(columns="row_version")
+            # Plain object columns can be patched in place; arrow-backed
+            # strings would be rebuilt whole on every merge.
+            text = rows.select_dtypes(include=["string", "str"]).columns
+            rows = rows.astype({c: object for c in text})
+        else:
+            # No ORDER BY: sorting on date would make SQLite walk the
+            # primary key instead of the row_version index.
+            hot = _read_rows(conn, journal_id, "AND row_version > ?", (base,), order_by="")
+            paths = conn.execute(
+                "SELECT path FROM journal_archive WHERE journal_id = ? AND max_row_version > ?",
+                (journal_id, base),
+            ).fetchall()
+            frames = [hot.drop(columns="row_version")]
+            if paths:
+                from .archive import read_partition
+
+                frames += [read_partition(archive_dir() / path) for (path,) in paths]
+            frames = [f for f in frames if not f.empty]
+            rows = pd.concat(frames, ignore_index=True) if frames else None
+
+    with _CACHE_LOCK:
+        CACHE_STATS["hits" if hit else "misses"] += 1
+        current = _DATASET_CACHE.get(key)
+        if current is not None and current["version"][2] >= version[2]:
+            cache = current  # another session refreshed at least as far
+        elif cache is None:
+            frame = rows.set_index(rows["date"].rename(None))
+            cache = {"frame": frame, "watermark": version[2], "version": version}
+        else:
+            # The delta covers versions above ``base``, so it also applies to
+            # an entry refreshed past ``base`` since it was read.
+            if current is not None and current["watermark"] >= base:
+                cache = current
+            if rows is not None:
+                cache["frame"] = _merge_delta(cache["frame"], rows)
+            cache.update(watermark=version[2], version=version)
+        _DATASET_CACHE[key] = cache
+        _DATASET_CACHE.move_to_end(key)
+        while len(_DATASET_CACHE) > DATASET_CACHE_SIZE:
+            _DATASET_CACHE.popitem(last=False)
+        return cache["frame"].reset_index(drop=True)
+
 
+def cache_stats() -> dict:
+    with _CACHE_LOCK:
+        return dict(CACHE_STATS)
@@ -1,141 +1,729 @@
 from __future__ import annotations
 
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import csv
+from datetime import datetime, time as dt_time, timedelta
+import gzip
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+
 import pandas as pd
 
-from .db import upsert_entry
-from .utils import french_day_name, float_to_time_str
-
-
-def import_csv_to_db(file) -> int:
-    df = pd.read_csv(file, engine="python", sep=None)
-
-    col_map = {
-        "Temps": "date",
-        "V_jour": "day_name",
-        "%nico": "nico",
-        "L_eau": "water_l",
-        "T_coffee": "coffee",
-        "L_bière": "beer_l",
-        "L_biere": "beer_l",
-        "cl_alcool": "alcool_cl",
-        "cl_vin": "wine_cl",
-        "L_soda": "soda_l",
-        "B_soiree": "soiree",
-        "N_soiree": "soiree_name",
-        "V_debout": "wake_time",
-        "V_couche": "sleep_time",
-        "V_somm": "sleep_hours",
-        "B_courrir": "ran",
-        "V_courrir": "run_km",
-        "V_poids": "weight",
-        "date": "date",
-        "day_name": "day_name",
-        "nico": "nico",
-        "water_l": "water_l",
-        "coffee": "coffee",
-        "beer_l": "beer_l",
-        "alcool_cl": "alcool_cl",
-        "wine_cl": "wine_cl",
-        "soda_l": "soda_l",
-        "soiree": "soiree",
-        "soiree_name": "soiree_name",
-        "wake_time": "wake_time",
-        "sleep_time": "sleep_time",
-        "sleep_hours": "sleep_hours",
-        "ran": "ran",
-        "run_km": "run_km",
-        "weight": "weight",
-    }
-
-    new_cols = {col: col_map[col] for col in df.columns if col in col_map}
+from .db import (
+    COLUMNS,
+    DEFAULT_JOURNAL_ID,
+    EXPORT_CHUNK_ROWS,
+    diff_rows,
+    iter_chunks,
+    upsert_many,
+)
+from .profiling import profiled
+from .utils import day_names_for_dates, float_series_to_time_str, float_to_time_str
+
+
+COL_MAP = {
+    "Temps": "date",
+    "V_jour": "day_name",
+    "%nico": "nico",
+    "L_eau": "water_l",
+    "T_coffee": "coffee",
+    "L_bière": "beer_l",
+    "L_biere": "beer_l",
+    "cl_alcool": "alcool_cl",
+    "cl_vin": "wine_cl",
+    "L_soda": "soda_l",
+    "B_soiree": "soiree",
+    "N_soiree": "soiree_name",
+    "V_debout": "wake_time",
+    "V_couche": "sleep_time",
+    "V_somm": "sleep_hours",
+    "B_courrir": "ran",
+    "V_courrir": "run_km",
+    "V_poids": "weight",
+    "date": "date",
+    "day_name": "day_name",
+    "nico": "nico",
+    "water_l": "water_l",
+    "coffee": "coffee",
+    "beer_l": "beer_l",
+    "alcool_cl": "alcool_cl",
+    "wine_cl": "wine_cl",
+    "soda_l": "soda_l",
+    "soiree": "soiree",
+    "soiree_name": "soiree_name",
+    "wake_time": "wake_time",
+    "sleep_time": "sleep_time",
+    "sleep_hours": "sleep_hours",
+    "ran": "ran",
+    "run_km": "run_km",
+    "weight": "weight",
+}
+
+
+# Columns parsed as strings from CSV files, and columns cast to int.
+CSV_TEXT_COLUMNS = ("date", "day_name", "soiree_name")
+CSV_INT_COLUMNS = ["soiree", "ran", "coffee"]
+ZERO_DEFAULT_COLUMNS = [
+    "water_l",
+    "beer_l",
+    "alcool_cl",
+    "wine_cl",
+    "soda_l",
+    "sleep_hours",
+    "run_km",
+]
+NULLABLE_COLUMNS = ["nico", "weight"]
+SNIFF_SAMPLE_BYTES = 64 * 1024
+SNIFF_ENCODINGS = ("utf-8-sig", "cp1252", "latin-1")
+# Upload types accepted by the importer: the Excel exports, workbooks, zip
+# archives of those, and every ``EXPORT_FORMATS`` file ("gz" for csv.gz).
+IMPORT_TYPES = ("csv", "gz", "xlsx", "zip", "parquet", "feather")
+EXPORT_FORMATS = {
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+    "feather": "application/vnd.apache.arrow.file",
+}
+# Exports stay in memory up to this size, then spill to a temporary file.
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024
+# gzip's own default; level 9 is ~3x slower for a few percent smaller output.
+EXPORT_GZIP_LEVEL = 6
+
+# Background imports: jobs share a small pool; finished jobs are forgotten
+# oldest first once there are more than IMPORT_JOB_HISTORY of them.
+IMPORT_JOB_WORKERS = 2
+IMPORT_JOB_HISTORY = 50
+IMPORT_CHUNK_ROWS = 2000
+JOB_ACTIVE_STATES = ("queued", "running")
+# Multi-file imports: which source wins when several carry the same date.
+# "last" lets later files (and zip members, taken in name order) override
+# earlier ones; "first" keeps the earliest.
+IMPORT_PRECEDENCES = ("last", "first")
+# Workers are not forked from the threaded server; they re-import the main
+# script, which must guard its work with ``if __name__ == "__main__"``.
+IMPORT_MP_START = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+IMPORT_CANCEL_POLL_S = 0.2
+# Workbooks are read from this sheet (the one users used to export as CSV).
+XLSX_SHEET = "DB_DATA_SCADA"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_PARQUET_MAGIC = b"PAR1"
+_FEATHER_MAGIC = b"ARROW1"
+_COMMA_DECIMAL = re.compile(r"^\s*-?\d+,\d+\s*$")
+_DOT_DECIMAL = re.compile(r"^\s*-?\d+\.\d+\s*$")
+
+
+def _decode_sample(sample: bytes) -> tuple[str, str]:
+    for encoding in SNIFF_ENCODINGS:
+        try:
+            return sample.decode(encoding), encoding
+        except UnicodeDecodeError as e:
+            # A multi-byte character cut by the end of the sample is fine.
+            if e.start >= len(sample) - 3:
+                return sample[: e.start].decode(encoding), encoding
+    return sample.decode("latin-1"), "latin-1"
+
+
+def sniff_csv(file, sample_size: int = SNIFF_SAMPLE_BYTES) -> dict:
+    """Guess separator, decimal mark and encoding from the head of ``file``."""
+    pos = file.tell()
+    sample = file.read(sample_size)
+    file.seek(pos)
+    if isinstance(sample, str):
+        text, encoding = sample, None
+    else:
+        text, encoding = _decode_sample(sample)
+
+    lines = text.splitlines()
+    if len(text) >= sample_size and len(lines) > 1:
+        lines = lines[:-1]  # last line is probably truncated
+    try:
+        sep = csv.Sniffer().sniff("\n".join(lines[:50]), delimiters=";,\t|").delimiter
+    except csv.Error:
+        header = lines[0] if lines else ""
+        sep = max(";,\t|", key=header.count)
+
+    decimal = "."
+    if sep != ",":
+        cells = [cell for line in lines[1:] for cell in line.split(sep)]
+        commas = sum(1 for cell in cells if _COMMA_DECIMAL.match(cell))
+        dots = sum(1 for cell in cells if _DOT_DECIMAL.match(cell))
+        if commas > dots:
+            decimal = ","
+    return {"sep": sep, "decimal": decimal, "encoding": encoding}
+
+
+def read_csv_fast(file, chunksize: int | None = None, dialect: dict | None = None):
+    """Parse ``file`` with the C engine using a sniffed dialect."""
+    dialect = dialect or sniff_csv(file)
+    dtype = {raw: str for raw, col in COL_MAP.items() if col in CSV_TEXT_COLUMNS}
+    return pd.read_csv(
+        file,
+        engine="c",
+        sep=dialect["sep"],
+        decimal=dialect["decimal"],
+        encoding=dialect["encoding"],
+        dtype=dtype,
+        chunksize=chunksize,
+    )
+
+
+def _is_xlsx(file) -> bool:
+    """Whether ``file`` (a path or seekable stream) is an Excel workbook."""
+    if not isinstance(file, (str, os.PathLike)):
+        pos = file.tell()
+    try:
+        if not zipfile.is_zipfile(file):
+            return False
+        with zipfile.ZipFile(file) as zf:
+            return "xl/workbook.xml" in zf.namelist()
+    finally:
+        if not isinstance(file, (str, os.PathLike)):
+            file.seek(pos)
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """ISO dates (app exports) or day-first ones (Excel); anything else is NaT."""
+    dates = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    rest = dates.isna() & values.notna()
+    if rest.any():
+        dates[rest] = pd.to_datetime(values[rest], errors="coerce", dayfirst=True)
+    return dates
+
+
+def _cell_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        from openpyxl.utils.datetime import from_excel
+
+        return from_excel(value).date()  # a date typed as a plain number
+    if isinstance(value, str):
+        # Text dates are parsed like CSV dates; NaT becomes None and is dropped.
+        parsed = _parse_dates(pd.Series([value], dtype=object)).iloc[0]
+        return None if pd.isna(parsed) else parsed.date()
+    return value
+
+
+def _cell_hhmm(value) -> str | None:
+    """``HH:MM`` of a time, datetime or duration cell, or of fractional hours."""
+    if isinstance(value, datetime):
+        value = value.time()
+    if isinstance(value, dt_time):
+        seconds = value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+    elif isinstance(value, timedelta):
+        seconds = value.total_seconds()
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float_to_time_str(value)
+    else:
+        return value or None
+    # Excel stores times as fractions of a day, so 07:15 may read as 07:14:59.999.
+    minutes = round(seconds / 60) % 1440
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def read_xlsx(file, chunksize: int | None = None, sheet: str = XLSX_SHEET):
+    """Stream a workbook sheet as ``COL_MAP`` frames; returns ``(total_rows, chunks)``."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    if sheet not in workbook.sheetnames:
+        workbook.close()
+        raise ValueError(
+            f"Feuille '{sheet}' introuvable dans le classeur ({', '.join(workbook.sheetnames)})."
+        )
+    worksheet = workbook[sheet]
+    total = worksheet.max_row
+
+    def chunks():
+        try:
+            rows = worksheet.iter_rows(values_only=True)
+            columns = {}
+            for header in rows:
+                for index, cell in enumerate(header):
+                    name = COL_MAP.get(cell.strip()) if isinstance(cell, str) else None
+                    if name is not None and name not in columns.values():
+                        columns[index] = name
+                if columns:
+                    break
+            convert = {
+                name: _cell_date if name == "date" else _cell_hhmm
+                for name in columns.values()
+                if name in ("date", "wake_time", "sleep_time")
+            }
+            batch, count = {name: [] for name in columns.values()}, 0
+            for row in rows:
+                if not any(cell is not None for cell in row):
+                    continue
+                for index, name in columns.items():
+                    value = row[index] if index < len(row) else None
+                    batch[name].append(convert[name](value) if name in convert else value)
+                count += 1
+                if chunksize is not None and count >= chunksize:
+                    yield pd.DataFrame(batch)
+                    batch, count = {name: [] for name in columns.values()}, 0
+            if count or chunksize is None:
+                yield pd.DataFrame(batch)
+        finally:
+            workbook.close()
+
+    return total, chunks()
+
+
+def _head(file, size: int) -> bytes:
+    pos = file.tell()
+    try:
+        return file.read(size)
+    finally:
+        file.seek(pos)
+
+
+def read_arrow(file, chunksize: int | None = None):
+    """Stream a Parquet or Feather export; returns ``(total_rows, chunks)``."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if _head(file, len(_PARQUET_MAGIC)) == _PARQUET_MAGIC:
+        parquet = pq.ParquetFile(file)
+        total = parquet.metadata.num_rows
+        batches = parquet.iter_batches(batch_size=chunksize or max(total, 1))
+    else:
+        reader = pa.ipc.open_file(file)
+        total = None
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+    def chunks():
+        if chunksize is None:
+            yield pa.Table.from_batches(list(batches)).to_pandas()
+            return
+        for batch in batches:
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize).to_pandas()
+
+    return total, chunks()
+
+
+def _read_source(file, chunksize: int | None):
+    """``(total, chunks, total_is_rows)`` for a CSV, csv.gz, workbook or Arrow file."""
+    if _is_xlsx(file):
+        return (*read_xlsx(file, chunksize), True)
+    head = _head(file, len(_FEATHER_MAGIC))
+    if head.startswith(_PARQUET_MAGIC) or head == _FEATHER_MAGIC:
+        return (*read_arrow(file, chunksize), True)
+    size = _stream_size(file)
+    if head.startswith(_GZIP_MAGIC):
+        file = gzip.GzipFile(fileobj=file, mode="rb")
+    if chunksize is None:
+        return size, [read_csv_fast(file)], False
+    return size, read_csv_fast(file, chunksize=chunksize), False
+
+
+@profiled("import.normalise_frame")
+def normalise_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Map raw CSV columns onto the journal schema and apply default values."""
+    new_cols = {col: COL_MAP[col] for col in df.columns if col in COL_MAP}
     df = df.rename(columns=new_cols)
 
-    wanted_cols = [
-        "date",
-        "day_name",
-        "nico",
-        "water_l",
-        "coffee",
-        "beer_l",
-        "alcool_cl",
-        "wine_cl",
-        "soda_l",
-        "soiree",
-        "soiree_name",
-        "wake_time",
-        "sleep_time",
-        "sleep_hours",
-        "ran",
-        "run_km",
-        "weight",
-    ]
-    for c in wanted_cols:
+    for c in COLUMNS:
         if c not in df.columns:
             df[c] = None
 
-    if df["date"].isna().all():
-        raise ValueError("Aucune colonne 'date' ou 'Temps' valide trouvée dans le CSV.")
-
-    df["date"] = pd.to_datetime(df["date"], errors="coerce", dayfirst=True).dt.date
+    df["date"] = _parse_dates(df["date"]).dt.date
     df = df.dropna(subset=["date"])
 
-    if df["wake_time"].dtype != "object":
-        df["wake_time"] = df["wake_time"].apply(float_to_time_str)
+    for col in ["wake_time", "sleep_time"]:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = float_series_to_time_str(df[col])
+        else:
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+
+    for col in CSV_INT_COLUMNS:
+        df[col] = df[col].fillna(0).astype(int)
+    for col in ZERO_DEFAULT_COLUMNS + NULLABLE_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ZERO_DEFAULT_COLUMNS:
+        df[col] = df[col].fillna(0.0)
+
+    day_name = df["day_name"].astype(object)
+    missing = day_name.isna() | day_name.isin(["", "nan", "NaT"])
+    df["day_name"] = day_name.where(~missing, day_names_for_dates(df["date"], "fr"))
+    df["soiree_name"] = df["soiree_name"].astype(object).where(df["soiree_name"].notna(), None)
+
+    return df[list(COLUMNS)]
+
+
+def _stream_size(file) -> int | None:
+    try:
+        pos = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(pos)
+    except (AttributeError, OSError):
+        return None
+    return size or None
+
+
+class ImportCancelled(Exception):
+    """Raised by ``import_csv_to_db`` when its ``cancel`` event is set."""
+
+    def __init__(self, rows_written: int):
+        super().__init__(f"import cancelled after {rows_written} rows")
+        self.rows_written = rows_written
+
+
+@profiled("import.import_csv_to_db")
+def import_csv_to_db(
+    file,
+    chunksize: int | None = None,
+    progress=None,
+    journal_id: int = DEFAULT_JOURNAL_ID,
+    cancel: threading.Event | None = None,
+    workers: int | None = None,
+    precedence: str = "last",
+    dry_run: bool = False,
+) -> dict:
+    """Import a CSV, workbook, app export, zip or list of them; upsert the rows.
+
+    Returns the row counts, or ``diff_rows``'s report with ``dry_run``.
+    """
+    if isinstance(file, (list, tuple)):
+        return _import_many(file, progress, journal_id, cancel, workers, precedence, dry_run)
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as fh:
+            return import_csv_to_db(
+                fh, chunksize, progress, journal_id, cancel, workers, precedence, dry_run
+            )
+    if _is_zip(file) and not _is_xlsx(file):
+        return _import_many([file], progress, journal_id, cancel, workers, precedence, dry_run)
+
+    size, chunks, size_in_rows = _read_source(file, chunksize)
+
+    parsed = written = consumed = 0
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    frames = []  # dry run: every normalised chunk, diffed once at the end
+    pending = None  # (future, rows) of the chunk being committed
+    for chunk in chunks:
+        consumed += len(chunk)
+        if cancel is not None and cancel.is_set():
+            if pending is not None and not pending[0].cancel():
+                written += _settle(pending, counts)
+            raise ImportCancelled(written)
+        df = normalise_frame(chunk)
+        if pending is not None:
+            written += _settle(pending, counts)
+            pending = None
+        if df.empty:
+            pass
+        elif dry_run:
+            frames.append(df)
+        else:
+            pending = (upsert_many(df, journal_id=journal_id, wait=False), len(df))
+        parsed += len(df)
+        if progress is not None:
+            done = consumed if size_in_rows else file.tell()
+            progress(parsed, written, min(done / size, 1.0) if size else None)
+    if pending is not None:
+        written += _settle(pending, counts)
+        if progress is not None:
+            progress(parsed, written, 1.0 if size else None)
+
+    if parsed == 0:
+        raise ValueError("Aucune colonne 'date' ou 'Temps' valide trouvée dans le fichier.")
+    if dry_run:
+        return {"rows": parsed, **diff_rows(pd.concat(frames, ignore_index=True), journal_id)}
+    return {"rows": parsed, **counts}
+
+
+def _settle(pending: tuple, counts: dict) -> int:
+    """Wait for a chunk's write, add its outcome to ``counts``; returns its rows."""
+    future, rows = pending
+    for key, n in future.result().items():
+        counts[key] += n
+    return rows
+
+
+def _is_zip(file) -> bool:
+    pos = file.tell()
+    try:
+        return zipfile.is_zipfile(file)
+    finally:
+        file.seek(pos)
+
+
+def _zip_sources(archive, name: str) -> list[tuple[str, bytes]]:
+    with zipfile.ZipFile(archive) as zf:
+        members = sorted(
+            info.filename
+            for info in zf.infolist()
+            if not info.is_dir()
+            and info.filename.lower().endswith(tuple(f".{t}" for t in IMPORT_TYPES if t != "zip"))
+            and not info.filename.startswith("__MACOSX/")
+        )
+        return [(f"{name}/{member}", zf.read(member)) for member in members]
+
+
+def _expand_sources(files) -> list[tuple[str, bytes | str]]:
+    """Flatten paths, file objects and zip archives into ``(name, payload)`` sources."""
+    sources = []
+    for item in files:
+        if isinstance(item, (str, os.PathLike)):
+            path = os.fspath(item)
+            if zipfile.is_zipfile(path) and not _is_xlsx(path):
+                sources += _zip_sources(path, path)
+            else:
+                sources.append((path, path))
+            continue
+        name = getattr(item, "name", None) or f"file {len(sources) + 1}"
+        if _is_zip(item) and not _is_xlsx(item):
+            sources += _zip_sources(item, name)
+        else:
+            data = item.read()
+            sources.append((name, data.encode() if isinstance(data, str) else data))
+    return sources
+
+
+def _normalise_source(source: tuple[str, bytes | str]) -> pd.DataFrame:
+    """Parse and normalise one source chunk by chunk; runs in a worker process."""
+    name, payload = source
+    try:
+        with io.BytesIO(payload) if isinstance(payload, bytes) else open(payload, "rb") as fh:
+            chunks = _read_source(fh, IMPORT_CHUNK_ROWS)[1]
+            frames = [normalise_frame(chunk) for chunk in chunks]
+            if not frames:
+                return normalise_frame(pd.DataFrame())
+            return pd.concat(frames, ignore_index=True)
+    except Exception as exc:
+        raise ValueError(f"{name}: {exc}") from None
+
+
+def _import_many(files, progress, journal_id, cancel, workers, precedence, dry_run) -> dict:
+    """Import several files and/or zip archives in parallel, committed as one write."""
+    if precedence not in IMPORT_PRECEDENCES:
+        raise ValueError(f"Unknown precedence: {precedence!r}")
+    sources = _expand_sources(files)
+    workers = min(workers or os.cpu_count() or 1, len(sources))
+    frames: list[pd.DataFrame | None] = [None] * len(sources)
+    parsed = 0
+
+    def collect(index: int, frame: pd.DataFrame) -> None:
+        nonlocal parsed
+        frames[index] = frame
+        parsed += len(frame)
+        if progress is not None:
+            progress(parsed, 0, sum(f is not None for f in frames) / len(frames))
+
+    if workers <= 1:
+        for index, source in enumerate(sources):
+            if cancel is not None and cancel.is_set():
+                raise ImportCancelled(0)
+            collect(index, _normalise_source(source))
     else:
-        df["wake_time"] = df["wake_time"].astype(str).where(df["wake_time"].notna(), None)
+        context = multiprocessing.get_context(IMPORT_MP_START)
+        if IMPORT_MP_START == "forkserver":
+            # Workers fork with pandas and the parser already imported.
+            context.set_forkserver_preload([__name__])
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            pending = {pool.submit(_normalise_source, s): i for i, s in enumerate(sources)}
+            try:
+                while pending:
+                    if cancel is not None and cancel.is_set():
+                        raise ImportCancelled(0)
+                    finished, _ = wait(
+                        pending, timeout=IMPORT_CANCEL_POLL_S, return_when=FIRST_COMPLETED
+                    )
+                    for future in finished:
+                        collect(pending.pop(future), future.result())
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
 
-    if df["sleep_time"].dtype != "object":
-        df["sleep_time"] = df["sleep_time"].apply(float_to_time_str)
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        raise ValueError("Aucune colonne 'date' ou 'Temps' valide trouvée dans le fichier.")
+    merged = pd.concat(frames, ignore_index=True).drop_duplicates("date", keep=precedence)
+    if cancel is not None and cancel.is_set():
+        raise ImportCancelled(0)
+    if dry_run:
+        report = diff_rows(merged, journal_id)
     else:
-        df["sleep_time"] = df["sleep_time"].astype(str).where(df["sleep_time"].notna(), None)
-
-    df["soiree"] = df["soiree"].fillna(0).astype(int)
-    df["ran"] = df["ran"].fillna(0).astype(int)
-    df["coffee"] = df["coffee"].fillna(0).astype(int)
-
-    for col in [
-        "nico",
-        "water_l",
-        "beer_l",
-        "alcool_cl",
-        "wine_cl",
-        "soda_l",
-        "sleep_hours",
-        "run_km",
-        "weight",
-    ]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+        report = upsert_many(merged, journal_id=journal_id)
+    if progress is not None:
+        progress(parsed, 0 if dry_run else len(merged), 1.0)
+    return {"rows": len(merged), **report}
 
-    df["day_name"] = df["day_name"].astype(str)
-    df.loc[df["day_name"].isin(["", "nan", "NaT"]), "day_name"] = df["date"].apply(
-        french_day_name
-    )
 
-    count = 0
-    for _, row in df.iterrows():
-        data = {
-            "date": row["date"].isoformat(),
-            "day_name": row["day_name"],
-            "nico": float(row["nico"]) if not pd.isna(row["nico"]) else None,
-            "water_l": float(row["water_l"]) if not pd.isna(row["water_l"]) else 0.0,
-            "coffee": int(row["coffee"]) if not pd.isna(row["coffee"]) else 0,
-            "beer_l": float(row["beer_l"]) if not pd.isna(row["beer_l"]) else 0.0,
-            "alcool_cl": float(row["alcool_cl"]) if not pd.isna(row["alcool_cl"]) else 0.0,
-            "wine_cl": float(row["wine_cl"]) if not pd.isna(row["wine_cl"]) else 0.0,
-            "soda_l": float(row["soda_l"]) if not pd.isna(row["soda_l"]) else 0.0,
-            "soiree": int(row["soiree"]) if not pd.isna(row["soiree"]) else 0,
-            "soiree_name": row["soiree_name"] if pd.notna(row["soiree_name"]) else None,
-            "wake_time": row["wake_time"] if pd.notna(row["wake_time"]) else None,
-            "sleep_time": row["sleep_time"] if pd.notna(row["sleep_time"]) else None,
-            "sleep_hours": (
-                float(row["sleep_hours"]) if not pd.isna(row["sleep_hours"]) else 0.0
-            ),
-            "ran": int(row["ran"]) if not pd.isna(row["ran"]) else 0,
-            "run_km": float(row["run_km"]) if not pd.isna(row["run_km"]) else 0.0,
-            "weight": float(row["weight"]) if not pd.isna(row["weight"]) else None,
+_JOBS: dict[str, dict] = {}
+_JOB_KEYS: dict[tuple[int, str], str] = {}  # (journal_id, sha256 of upload) -> job id
+_JOB_CANCEL: dict[str, threading.Event] = {}
+_JOB_FUTURES: dict = {}
+_JOBS_LOCK = threading.Lock()
+_JOB_POOL: ThreadPoolExecutor | None = None
+
+
+def submit_import(
+    data: bytes | list[tuple[str, bytes]],
+    journal_id: int = DEFAULT_JOURNAL_ID,
+    chunksize: int = IMPORT_CHUNK_ROWS,
+    name: str | None = None,
+) -> str:
+    """Import ``data`` in the background; identical uploads share a job. Returns its id."""
+    global _JOB_POOL
+    hasher = hashlib.sha256()
+    for part in [data] if isinstance(data, bytes) else [d for _, d in data]:
+        hasher.update(len(part).to_bytes(8, "little"))
+        hasher.update(part)
+    digest = hasher.hexdigest()
+    with _JOBS_LOCK:
+        existing = _JOB_KEYS.get((journal_id, digest))
+        if existing is not None and _JOBS[existing]["state"] not in ("failed", "cancelled"):
+            return existing
+        job_id = uuid.uuid4().hex[:12]
+        _JOBS[job_id] = {
+            "id": job_id,
+            "name": name,
+            "journal_id": journal_id,
+            "sha256": digest,
+            "state": "queued",
+            "rows_parsed": 0,
+            "rows_written": 0,
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "fraction": 0.0,
+            "error": None,
+            "submitted": time.time(),
+            "finished": None,
         }
-        upsert_entry(data)
-        count += 1
+        _JOB_KEYS[(journal_id, digest)] = job_id
+        _JOB_CANCEL[job_id] = threading.Event()
+        if _JOB_POOL is None:
+            _JOB_POOL = ThreadPoolExecutor(IMPORT_JOB_WORKERS, thread_name_prefix="bt-import")
+        _JOB_FUTURES[job_id] = _JOB_POOL.submit(_run_import_job, job_id, data, chunksize)
+    return job_id
+
+
+def job_status(job_id: str) -> dict | None:
+    """Snapshot of an import job, or ``None`` if it is unknown."""
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+        return dict(job) if job is not None else None
+
+
+def cancel_import(job_id: str) -> bool:
+    """Ask a queued or running job to stop; returns whether it was still active."""
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+        if job is None or job["state"] not in JOB_ACTIVE_STATES:
+            return False
+        _JOB_CANCEL[job_id].set()
+        if _JOB_FUTURES[job_id].cancel():
+            _finish_job(job, "cancelled")
+    return True
+
+
+def _update_job(job_id: str, **fields) -> None:
+    with _JOBS_LOCK:
+        _JOBS[job_id].update(fields)
+
+
+def _finish_job(job: dict, state: str, **fields) -> None:
+    """Mark ``job`` finished and forget the oldest finished jobs; hold ``_JOBS_LOCK``."""
+    job.update(fields, state=state, finished=time.time())
+    _JOB_FUTURES.pop(job["id"], None)
+    _JOB_CANCEL.pop(job["id"], None)
+    finished = [j for j in _JOBS.values() if j["state"] not in JOB_ACTIVE_STATES]
+    for old in sorted(finished, key=lambda j: j["finished"])[:-IMPORT_JOB_HISTORY]:
+        del _JOBS[old["id"]]
+        if _JOB_KEYS.get((old["journal_id"], old["sha256"])) == old["id"]:
+            del _JOB_KEYS[(old["journal_id"], old["sha256"])]
+
+
+def _upload_file(name: str | None, data: bytes) -> io.BytesIO:
+    file = io.BytesIO(data)
+    file.name = name
+    return file
+
+
+def _run_import_job(job_id: str, data, chunksize: int) -> None:
+    with _JOBS_LOCK:
+        job = _JOBS[job_id]
+        job["state"] = "running"
+        journal_id, cancel = job["journal_id"], _JOB_CANCEL[job_id]
+
+    def on_progress(parsed, written, fraction):
+        _update_job(job_id, rows_parsed=parsed, rows_written=written, fraction=fraction)
+
+    if isinstance(data, bytes):
+        file = _upload_file(job["name"], data)
+    else:
+        file = [_upload_file(name, part) for name, part in data]
+    try:
+        result = import_csv_to_db(file, chunksize, on_progress, journal_id, cancel)
+    except ImportCancelled as exc:
+        outcome = ("cancelled", {"rows_written": exc.rows_written})
+    except Exception as exc:
+        outcome = ("failed", {"error": str(exc)})
+    else:
+        counts = {key: result[key] for key in ("inserted", "updated", "unchanged")}
+        outcome = ("done", {"fraction": 1.0, **counts})
+    with _JOBS_LOCK:
+        _finish_job(job, outcome[0], **outcome[1])
+
+
+@profiled("export.export_journal")
+def export_journal(
+    fmt: str, chunk_rows: int = EXPORT_CHUNK_ROWS, journal_id: int = DEFAULT_JOURNAL_ID
+) -> io.BytesIO | io.BufferedReader:
+    """Stream the journal into a compressed ``fmt`` file (see ``EXPORT_FORMATS``)."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    if fmt == "csv.gz":
+        with gzip.GzipFile(
+            fileobj=out, mode="wb", compresslevel=EXPORT_GZIP_LEVEL, mtime=0
+        ) as gz:
+            text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+            header = True
+            for chunk in iter_chunks(chunk_rows, journal_id):
+                chunk.to_csv(text, index=False, header=header)
+                header = False
+            if header:
+                pd.DataFrame(columns=list(COLUMNS)).to_csv(text, index=False)
+            text.flush()
+            text.detach()
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        from .archive import ARCHIVE_COMPRESSION, arrow_schema, to_arrow
+
+        with pq.ParquetWriter(out, arrow_schema(), compression=ARCHIVE_COMPRESSION) as writer:
+            for chunk in iter_chunks(chunk_rows, journal_id):
+                writer.write_table(to_arrow(chunk))
+    else:
+        import pyarrow as pa
+
+        from .archive import ARCHIVE_COMPRESSION, arrow_schema, to_arrow
 
-    return count
+        options = pa.ipc.IpcWriteOptions(compression=ARCHIVE_COMPRESSION)
+        with pa.ipc.new_file(out, arrow_schema(), options=options) as writer:
+            for chunk in iter_chunks(chunk_rows, journal_id):
+                writer.write_table(to_arrow(chunk))
 
+    size = out.tell()
+    out.seek(0)
+    if size <= EXPORT_SPOOL_BYTES:
+        with out:
+            return io.BytesIO(out.read())
+    # Spilled to disk: hand out a plain reader on the (unlinked) temporary file.
+    reader = open(os.dup(out.fileno()), "rb")
+    out.close()
+    return reader
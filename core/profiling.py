@@ -0,0 +1,95 @@
+"""Opt-in per-rerun profiling: named spans, counters and a JSON-lines log."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import functools
+import json
+import os
+import threading
+import time
+
+
+ENV_ENABLED = "BT_PROFILE"
+ENV_LOG = "BT_PROFILE_LOG"
+
+_LOCAL = threading.local()
+_LOG_LOCK = threading.Lock()
+
+
+def enabled_by_env() -> bool:
+    return os.environ.get(ENV_ENABLED, "") not in ("", "0")
+
+
+def active() -> bool:
+    return getattr(_LOCAL, "report", None) is not None
+
+
+@contextmanager
+def run(name: str, enabled: bool = True):
+    """Profile this thread's work inside the block as one run; yields the report or ``None``."""
+    if not enabled or active():
+        yield None
+        return
+    report = {"run": name, "started": time.time(), "total_ms": 0.0, "spans": {}, "counters": {}}
+    _LOCAL.report = report
+    start = time.perf_counter()
+    try:
+        yield report
+    finally:
+        _LOCAL.report = None
+        report["total_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        for entry in report["spans"].values():
+            entry["ms"] = round(entry["ms"], 3)
+        _write_log(report)
+
+
+@contextmanager
+def span(name: str):
+    report = getattr(_LOCAL, "report", None)
+    if report is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry = report["spans"].setdefault(name, {"ms": 0.0, "calls": 0})
+        entry["ms"] += (time.perf_counter() - start) * 1000
+        entry["calls"] += 1
+
+
+def profiled(name: str):
+    """Decorator recording each call of the function as span ``name``."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_LOCAL, "report", None) is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def count(counter: str, n: int) -> None:
+    report = getattr(_LOCAL, "report", None)
+    if report is not None:
+        report["counters"][counter] = report["counters"].get(counter, 0) + int(n)
+
+
+def _write_log(report: dict) -> None:
+    path = os.environ.get(ENV_LOG)
+    if not path:
+        return
+    line = json.dumps(report)
+    with _LOG_LOCK, open(path, "a", encoding="utf-8") as fh:
+        fh.write(line + "\n")
+
+
+def read_log(path) -> list[dict]:
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
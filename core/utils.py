@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 from datetime import date, datetime, time, timedelta
+import functools
+import math
+from typing import TYPE_CHECKING
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 DAY_NAMES = {
@@ -34,16 +38,48 @@ def compute_sleep_hours(sleep_t: time, wake_t: time) -> float:
 
 
 def float_to_time_str(x):
-    if pd.isna(x):
-        return None
+    """Excel fractional hours (``7.25``) to ``HH:MM``, wrapped into one day."""
     try:
         x = float(x)
-    except Exception:
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(x):
         return None
-    hours = int(x)
-    minutes = int(round((x - hours) * 60))
-    if minutes >= 60:
-        hours += 1
-        minutes -= 60
-    hours = hours % 24
-    return f"{hours:02d}:{minutes:02d}"
+    hours = math.trunc(x)
+    minutes = ((hours % 24) * 60 + round((x - hours) * 60)) % 1440
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@functools.cache
+def hhmm_table():
+    """Object array of the ``HH:MM`` string of every minute of the day."""
+    import numpy as np
+
+    return np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)], dtype=object)
+
+
+def float_series_to_time_str(s: pd.Series) -> pd.Series:
+    """Vectorized ``float_to_time_str``: Excel fractional hours to ``HH:MM``."""
+    import numpy as np
+    import pandas as pd
+
+    x = pd.to_numeric(s, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    valid = np.isfinite(x)
+    x = np.where(valid, x, 0.0)
+    hours = np.trunc(x)
+    # Wrapping the hours first keeps huge values exact, as in the scalar.
+    minutes = np.mod(np.mod(hours, 24) * 60 + np.round((x - hours) * 60), 1440)
+    minutes = minutes.astype("int64")
+    out = hhmm_table()[minutes]
+    out[~valid] = None
+    return pd.Series(out, index=s.index, dtype=object)
+
+
+def day_names_for_dates(dates: pd.Series, language: str = "en") -> pd.Series:
+    """Vectorized ``day_name_for_language`` over a series of dates."""
+    import numpy as np
+    import pandas as pd
+
+    names = np.asarray(DAY_NAMES.get(language, DAY_NAMES["en"]), dtype=object)
+    weekdays = pd.to_datetime(dates).dt.weekday.to_numpy()
+    return pd.Series(names[weekdays], index=dates.index, dtype=object)
@@ -0,0 +1,167 @@
+"""Background writer that commits queued journal writes in grouped transactions."""
+
+from __future__ import annotations
+
+import atexit
+from concurrent.futures import Future
+import queue
+import sqlite3
+import threading
+import time
+
+from .db import (
+    BULK_BATCH_SIZE,
+    DEFAULT_JOURNAL_ID,
+    _next_row_version,
+    _refresh_rollups,
+    _write_rows,
+    get_conn,
+)
+
+
+WRITE_GROUP_MAX = 256
+WRITE_GROUP_MAX_ROWS = 2000
+# A locked database is retried with exponential backoff.
+WRITE_RETRIES = 5
+WRITE_BACKOFF_S = 0.05
+WRITE_BACKOFF_MAX_S = 2.0
+
+WRITER_STATS = {"groups": 0, "writes": 0, "retries": 0, "largest_group": 0}
+
+# Items are (journal_id, params, batch_size, future); None stops the thread.
+_QUEUE: queue.SimpleQueue = queue.SimpleQueue()
+_LOCK = threading.Lock()
+_THREAD: threading.Thread | None = None
+
+
+def submit_rows(
+    params: list[tuple],
+    journal_id: int = DEFAULT_JOURNAL_ID,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> Future:
+    """Queue an upsert of storage tuples; the future resolves to the write counts."""
+    future: Future = Future()
+    if not params:
+        future.set_result({"inserted": 0, "updated": 0, "unchanged": 0})
+        return future
+    _ensure_started()
+    _QUEUE.put((journal_id, params, batch_size, future))
+    return future
+
+
+def _ensure_started() -> None:
+    global _THREAD
+    with _LOCK:
+        if _THREAD is None or not _THREAD.is_alive():
+            _THREAD = threading.Thread(target=_run, name="bt-writer", daemon=True)
+            _THREAD.start()
+
+
+def stop(timeout: float | None = None) -> None:
+    """Commit whatever is queued, then stop the writer thread."""
+    global _THREAD
+    with _LOCK:
+        thread, _THREAD = _THREAD, None
+    if thread is not None and thread.is_alive():
+        _QUEUE.put(None)
+        thread.join(timeout)
+
+
+atexit.register(stop)
+
+
+def writer_stats() -> dict:
+    with _LOCK:
+        return dict(WRITER_STATS)
+
+
+def _next_group(held: list) -> list:
+    """Take queued writes up to the group limits, holding back any overflow."""
+    group, rows = [], 0
+    while len(group) < WRITE_GROUP_MAX:
+        if held:
+            item = held.pop()
+        else:
+            try:
+                item = _QUEUE.get_nowait() if group else _QUEUE.get()
+            except queue.Empty:
+                break
+        size = len(item[1]) if item is not None else 0
+        if group and rows + size > WRITE_GROUP_MAX_ROWS:
+            held.append(item)
+            break
+        group.append(item)
+        rows += size
+    return group
+
+
+def _run() -> None:
+    held: list = []
+    while True:
+        group = _next_group(held)
+        writes = [w for w in group if w is not None]
+        writes = [w for w in writes if w[3].set_running_or_notify_cancel()]
+        if writes:
+            _commit_group(writes)
+        if None in group:
+            return
+
+
+def _is_locked(exc: Exception) -> bool:
+    return isinstance(exc, sqlite3.OperationalError) and "locked" in str(exc)
+
+
+def _commit_group(writes: list[tuple]) -> None:
+    for attempt in range(WRITE_RETRIES + 1):
+        try:
+            outcomes = _apply(writes)
+        except Exception as exc:
+            if not _is_locked(exc) or attempt == WRITE_RETRIES:
+                for *_, future in writes:
+                    future.set_exception(exc)
+                return
+            with _LOCK:
+                WRITER_STATS["retries"] += 1
+            time.sleep(min(WRITE_BACKOFF_S * 2**attempt, WRITE_BACKOFF_MAX_S))
+            continue
+        with _LOCK:
+            WRITER_STATS["groups"] += 1
+            WRITER_STATS["writes"] += len(writes)
+            WRITER_STATS["largest_group"] = max(WRITER_STATS["largest_group"], len(writes))
+        for (*_, future), outcome in zip(writes, outcomes):
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+        return
+
+
+def _apply(writes: list[tuple]) -> list:
+    """Run ``writes`` in one transaction; returns a result or exception per write."""
+    outcomes = []
+    versions: dict[int, int] = {}
+    touched: dict[int, list[int]] = {}
+    with get_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for journal_id, params, batch_size, _ in writes:
+            if journal_id not in versions:
+                versions[journal_id] = _next_row_version(conn, journal_id)
+            conn.execute("SAVEPOINT write")
+            try:
+                outcome, written = _write_rows(
+                    conn, journal_id, params, versions[journal_id], batch_size
+                )
+            except Exception as exc:
+                if _is_locked(exc):
+                    raise
+                conn.execute("ROLLBACK TO write")
+                outcome = exc
+            else:
+                touched.setdefault(journal_id, []).extend(written)
+            conn.execute("RELEASE write")
+            outcomes.append(outcome)
+        for journal_id, days in touched.items():
+            if days:
+                _refresh_rollups(conn, journal_id, days)
+        conn.commit()
+    return outcomes
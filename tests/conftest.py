@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import pytest
+
+import core.db as db
+from core import writer
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point ``core.db`` at a fresh database file under ``tmp_path``."""
+    path = tmp_path / "journal.db"
+    db.close_all()
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.init_db()
+    yield path
+    writer.stop()
+    db.close_all()
+    db._DATASET_CACHE.clear()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from datetime import date
+
+import core.db as db
+from benchmarks.generator import journal_frame
+
+
+def _use(monkeypatch, path):
+    db.close_all()
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.init_db()
+
+
+def test_each_database_keeps_its_own_archive(tmp_path, monkeypatch):
+    a, b = tmp_path / "a.db", tmp_path / "b.db"
+    _use(monkeypatch, a)
+    db.upsert_many(journal_frame(800, start=date(2018, 1, 1)))
+    assert db.compact_archive(2020) == [2018, 2019]
+    _use(monkeypatch, b)
+    db.upsert_many(journal_frame(300, start=date(2019, 1, 1)))
+    assert db.compact_archive(2020) == [2019]
+
+    _use(monkeypatch, a)
+    assert len(db.load_all()) == 800
+    assert db.archive_dir() == tmp_path / "a.archive"
+
+
+def test_compaction_prunes_only_restored_partitions(db_path, monkeypatch):
+    db.upsert_many(journal_frame(800, start=date(2018, 1, 1)))
+    db.compact_archive(2020)
+    foreign = db.archive_dir() / "unrelated.parquet"
+    foreign.write_bytes(b"not ours")
+    (old_2018,) = db.archive_dir().glob("journal=1/year=2018/*.parquet")
+
+    entry = db.load_entry(date(2018, 3, 1))
+    db.upsert_entry({**entry, "weight": 80.0})
+    monkeypatch.setattr(db, "ARCHIVE_PRUNE_GRACE_S", 0.0)
+    with db.get_conn(readonly=True) as conn, db._snapshot(conn):
+        db.compact_archive(2020)
+        assert old_2018.exists()  # an open snapshot may still read it
+
+    db.compact_archive(2020)
+    assert not old_2018.exists()
+    assert foreign.exists()
+    assert db.load_entry(date(2018, 3, 1))["weight"] == 80.0
+    assert len(db.load_all()) == 800
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import date
+import threading
+
+import pandas as pd
+
+import core.db as db
+from benchmarks.generator import journal_frame
+
+
+def _assert_same(cached, loaded):
+    # The cache keeps text columns as plain objects so it can patch them.
+    pd.testing.assert_frame_equal(cached.astype(loaded.dtypes.to_dict()), loaded)
+
+
+def _weight(frame, day):
+    return frame.loc[frame["date"] == day, "weight"].iloc[0]
+
+
+def test_cache_sees_rows_edited_then_compacted(db_path):
+    db.upsert_many(journal_frame(1000, start=date(2020, 1, 1)))
+    day = date(2020, 11, 10)
+    assert _weight(db.load_all_cached(), day) == _weight(db.load_all(), day)
+
+    db.upsert_entry({**db.load_entry(day), "weight": 74.7})
+    db.compact_archive(2022)
+
+    assert _weight(db.load_all(), day) == 74.7
+    assert _weight(db.load_all_cached(), day) == 74.7
+    _assert_same(db.load_all_cached(), db.load_all())
+
+
+def test_cache_refreshes_incrementally(db_path):
+    db.upsert_many(journal_frame(500))
+    db.load_all_cached()
+    before = db.cache_stats()
+    db.load_all_cached()
+    assert db.cache_stats()["hits"] == before["hits"] + 1
+
+    db.upsert_entry({**db.load_entry(date(2000, 2, 1)), "nico": 9.5})
+    cached = db.load_all_cached()
+    assert db.cache_stats()["misses"] == before["misses"] + 1
+    _assert_same(cached, db.load_all())
+
+
+def test_cache_lock_not_held_during_reads(db_path, monkeypatch):
+    db.upsert_many(journal_frame(200))
+    seen = []
+    read_rows = db._read_all
+
+    def spy(conn, journal_id):
+        seen.append(db._CACHE_LOCK.locked())
+        return read_rows(conn, journal_id)
+
+    monkeypatch.setattr(db, "_read_all", spy)
+    thread = threading.Thread(target=db.load_all_cached)
+    thread.start()
+    thread.join()
+    assert seen == [False]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.charts import (
+    DARK_THEME,
+    DASHBOARD_DATASET,
+    chart_to_spec,
+    make_basic_line_chart,
+    make_dashboard,
+    make_dynamic_line_chart,
+    make_liquids_chart,
+    point_budget,
+    spec_size,
+)
+
+PANELS = [("weight", True), ("sleep_hours", True), ("nico", False), ("run_km", False)]
+LIQUIDS = ["water_l", "beer_l", "wine_cl", "alcool_cl", "soda_l"]
+
+
+def _frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2015-01-01", periods=rows, freq="D").date
+    data = {
+        "weight": 75 + rng.normal(0, 1, rows).cumsum() / 10,
+        "sleep_hours": rng.uniform(5, 9, rows).round(2),
+        "nico": rng.integers(0, 20, rows).astype(float),
+        "run_km": np.where(rng.random(rows) < 0.3, rng.uniform(3, 15, rows).round(1), np.nan),
+    }
+    for col in LIQUIDS:
+        data[col] = np.where(rng.random(rows) < 0.5, rng.uniform(0, 2, rows).round(2), np.nan)
+    return pd.DataFrame(data, index=pd.Index(index, name="date"))
+
+
+def _dashboard(df, max_points):
+    panels = [
+        {"column": col, "dynamic": dynamic, "title": col, "label": col, "empty": "-"}
+        for col, dynamic in PANELS
+    ]
+    liquids = {"columns": LIQUIDS, "labels": {c: c for c in LIQUIDS}, "title": "Liquids", "empty": "-"}
+    return make_dashboard(df, panels, liquids, max_points=max_points)
+
+
+def _separate_charts(df, max_points):
+    """What the app shipped before the dashboard: one spec per chart, each with its data."""
+    charts = [
+        (make_dynamic_line_chart if dynamic else make_basic_line_chart)(
+            df, col, col, max_points=max_points
+        )
+        for col, dynamic in PANELS
+    ]
+    charts.append(make_liquids_chart(df, LIQUIDS, {c: c for c in LIQUIDS}, max_points=max_points))
+    return [chart_to_spec(chart) for chart in charts]
+
+
+@pytest.mark.parametrize("rows", [200, 3000])
+def test_dashboard_shares_one_dataset(rows):
+    df = _frame(rows)
+    spec = chart_to_spec(_dashboard(df, point_budget()))
+
+    assert list(spec["datasets"]) == [DASHBOARD_DATASET]
+    assert len(spec["vconcat"]) == len(PANELS) + 1
+    assert spec["data"] == {"name": DASHBOARD_DATASET}
+    for panel in spec["vconcat"]:
+        assert panel.get("data", spec["data"]) == {"name": DASHBOARD_DATASET}
+        assert "datasets" not in panel
+
+    before = sum(spec_size(s) for s in _separate_charts(df, point_budget()))
+    assert spec_size(spec) < before
+
+
+def test_dashboard_dataset_keeps_only_plotted_columns():
+    df = _frame(100).assign(comment="x")
+    spec = chart_to_spec(_dashboard(df, None))
+    records = spec["datasets"][DASHBOARD_DATASET]
+    assert len(records) == 100
+    assert set(records[0]) == {"date", *(col for col, _ in PANELS), *LIQUIDS}
+
+
+@pytest.mark.filterwarnings("error")
+def test_chart_to_spec_applies_theme_per_call():
+    chart = make_basic_line_chart(_frame(20), "nico", "%")
+    dark = chart_to_spec(chart, DARK_THEME)
+    light = chart_to_spec(chart)
+    assert dark["config"]["background"] == "#0f172a"
+    assert "background" not in light.get("config", {})
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import functools
+import gzip
+import io
+
+import pandas as pd
+import pyarrow.feather as feather
+import pytest
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+import core.db as db
+import core.import_export as ie
+from benchmarks.generator import journal_frame
+
+
+def _download(fmt: str) -> bytes:
+    """Run ``export_journal`` through Streamlit's deferred download path."""
+    storage = MemoryMediaFileStorage("/media")
+    manager = MediaFileManager(storage)
+    file_id = manager.add_deferred(
+        functools.partial(ie.export_journal, fmt), ie.EXPORT_FORMATS[fmt], "export", "out"
+    )
+    url = manager.execute_deferred(file_id)
+    return storage.get_file(url.rsplit("/", 1)[-1]).content
+
+
+def _read(fmt: str, data: bytes) -> pd.DataFrame:
+    if fmt == "csv.gz":
+        return pd.read_csv(io.BytesIO(gzip.decompress(data)))
+    if fmt == "parquet":
+        return pd.read_parquet(io.BytesIO(data))
+    return feather.read_feather(io.BytesIO(data))
+
+
+@pytest.mark.parametrize("fmt", list(ie.EXPORT_FORMATS))
+@pytest.mark.parametrize("spool_bytes", [ie.EXPORT_SPOOL_BYTES, 1024])
+def test_export_downloads(db_path, monkeypatch, fmt, spool_bytes):
+    monkeypatch.setattr(ie, "EXPORT_SPOOL_BYTES", spool_bytes)
+    db.upsert_many(journal_frame(3000))
+    frame = _read(fmt, _download(fmt))
+    assert list(frame.columns) == list(db.COLUMNS)
+    assert len(frame) == 3000
+    assert str(frame["date"].iloc[-1]) == str(db.load_all()["date"].iloc[-1])
+
+
+def test_empty_export_downloads(db_path):
+    assert list(_read("csv.gz", _download("csv.gz")).columns) == list(db.COLUMNS)
+
+
+@pytest.mark.parametrize("fmt", list(ie.EXPORT_FORMATS))
+@pytest.mark.parametrize("chunksize", [None, 700])
+def test_export_imports_back(db_path, fmt, chunksize):
+    db.upsert_many(journal_frame(3000))
+    copy = db.journal_id_for("copy")
+    result = ie.import_csv_to_db(io.BytesIO(_download(fmt)), chunksize, journal_id=copy)
+    assert result == {"rows": 3000, "inserted": 3000, "updated": 0, "unchanged": 0}
+    pd.testing.assert_frame_equal(db.load_all(copy), db.load_all())
+
+
+def test_exports_import_back_together(db_path):
+    db.upsert_many(journal_frame(500))
+    files = []
+    for fmt in ie.EXPORT_FORMATS:
+        file = io.BytesIO(_download(fmt))
+        file.name = f"journal_bt.{fmt}"
+        files.append(file)
+    copy = db.journal_id_for("copy")
+    assert ie.import_csv_to_db(files, journal_id=copy, workers=1)["inserted"] == 500
+    pd.testing.assert_frame_equal(db.load_all(copy), db.load_all())
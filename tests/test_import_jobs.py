@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+import core.db as db
+import core.import_export as ie
+from benchmarks.generator import excel_frame
+from tests.test_rollups import _assert_rollups_match
+
+
+@pytest.fixture
+def jobs(db_path):
+    yield
+    for job_id in list(ie._JOBS):
+        ie.cancel_import(job_id)
+        _wait(job_id)
+    with ie._JOBS_LOCK:
+        ie._JOBS.clear()
+        ie._JOB_KEYS.clear()
+
+
+def _csv_bytes(rows: int, seed: int = 0) -> bytes:
+    return excel_frame(rows, seed=seed).to_csv(sep=";", decimal=",", index=False).encode()
+
+
+def _wait(job_id: str, timeout: float = 30.0) -> dict | None:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = ie.job_status(job_id)
+        if job is None or job["state"] not in ie.JOB_ACTIVE_STATES:
+            return job
+        assert time.monotonic() < deadline, job
+        time.sleep(0.01)
+
+
+def test_identical_upload_is_deduplicated(jobs):
+    data = _csv_bytes(50)
+    job_id = ie.submit_import(data)
+    assert ie.submit_import(data) == job_id
+    assert _wait(job_id)["state"] == "done"
+    assert ie.submit_import(data) == job_id  # a rerun after it finished
+    assert len(db.load_all()) == 50
+
+    other = db.journal_id_for("other")
+    assert ie.submit_import(data, journal_id=other) != job_id
+    assert ie.submit_import([("a.csv", data), ("b.csv", data)]) != job_id
+
+    failed = ie.submit_import(b"no;dates\n1;2\n")
+    assert _wait(failed)["state"] == "failed"
+    assert ie.submit_import(b"no;dates\n1;2\n") != failed  # failures can be retried
+
+
+def test_cancel_mid_import_keeps_whole_chunks(jobs, monkeypatch):
+    reached, resume = threading.Event(), threading.Event()
+    normalise = ie.normalise_frame
+    calls = []
+
+    def slow_normalise(chunk):
+        calls.append(len(chunk))
+        if len(calls) == 3:
+            reached.set()
+            resume.wait(10)
+        return normalise(chunk)
+
+    monkeypatch.setattr(ie, "normalise_frame", slow_normalise)
+    job_id = ie.submit_import(_csv_bytes(1000), chunksize=100)
+    assert reached.wait(10)
+    assert ie.cancel_import(job_id)
+    resume.set()
+
+    job = _wait(job_id)
+    assert job["state"] == "cancelled"
+    assert 0 < job["rows_written"] < 1000
+    assert job["rows_written"] % 100 == 0
+    assert len(db.load_all()) == job["rows_written"]
+    _assert_rollups_match()
+    assert not ie.cancel_import(job_id)
+    assert ie.submit_import(_csv_bytes(1000), chunksize=100) != job_id
+
+
+def test_cancel_queued_job(jobs, monkeypatch):
+    monkeypatch.setattr(ie, "IMPORT_JOB_WORKERS", 1)
+    monkeypatch.setattr(ie, "_JOB_POOL", None)
+    gate = threading.Event()
+    normalise = ie.normalise_frame
+    monkeypatch.setattr(ie, "normalise_frame", lambda chunk: (gate.wait(10), normalise(chunk))[1])
+
+    running = ie.submit_import(_csv_bytes(20))
+    queued = ie.submit_import(_csv_bytes(20, seed=1))
+    assert ie.cancel_import(queued)
+    assert ie.job_status(queued)["state"] == "cancelled"
+    gate.set()
+    assert _wait(running)["state"] == "done"
+    assert len(db.load_all()) == 20
+
+
+def test_finished_jobs_are_evicted(jobs, monkeypatch):
+    monkeypatch.setattr(ie, "IMPORT_JOB_HISTORY", 2)
+    uploads = [_csv_bytes(5, seed=seed) for seed in range(4)]
+    ids = []
+    for data in uploads:
+        ids.append(ie.submit_import(data))
+        assert _wait(ids[-1])["state"] == "done"
+
+    assert [ie.job_status(job_id) is not None for job_id in ids] == [False, False, True, True]
+    assert ie.submit_import(uploads[0]) not in ids  # its dedup key went with it
+    assert ie.submit_import(uploads[3]) == ids[3]
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import core.db as db
+
+APP = db.BASE_DIR / "app.py"
+
+
+def _visit(journal: str) -> AppTest:
+    at = AppTest.from_file(str(APP), default_timeout=60)
+    at.query_params["journal"] = journal
+    return at.run()
+
+
+def test_journal_lookup_does_not_create(db_path):
+    assert db.journal_id_for("anna", create=False) is None
+    assert db.list_journals() == [(db.DEFAULT_JOURNAL_ID, db.DEFAULT_JOURNAL_NAME)]
+    anna = db.journal_id_for("anna")
+    assert db.journal_id_for("anna", create=False) == anna
+
+
+@pytest.mark.parametrize("name", ["", "a" * (db.JOURNAL_NAME_MAX + 1), "a b", "../x", "x\n"])
+def test_invalid_journal_names_are_rejected(db_path, name):
+    assert not db.valid_journal_name(name)
+    with pytest.raises(ValueError, match="Invalid journal name"):
+        db.journal_id_for(name)
+    assert len(db.list_journals()) == 1
+
+
+def test_visiting_a_journal_url_creates_it_only_on_request(db_path):
+    at = _visit("anna")
+    assert not at.exception and not at.tabs
+    assert db.list_journals() == [(db.DEFAULT_JOURNAL_ID, db.DEFAULT_JOURNAL_NAME)]
+
+    at.button[0].click().run()
+    assert len(at.tabs) == 3
+    assert [name for _, name in db.list_journals()] == [db.DEFAULT_JOURNAL_NAME, "anna"]
+
+    at = _visit("<b>" * 20)
+    assert at.error and not at.button and not at.tabs
+    assert len(db.list_journals()) == 2
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import date, time
+import shutil
+import sqlite3
+
+import pandas as pd
+
+import core.db as db
+from tests.test_rollups import _assert_rollups_match
+
+BASELINE_DB = db.BASE_DIR / "data" / "journal_bt.db"
+
+
+def _read_only(path) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def _baseline_rows(path) -> pd.DataFrame:
+    with _read_only(path) as conn:
+        frame = pd.read_sql_query("SELECT * FROM journal ORDER BY date", conn)
+    frame["date"] = [date.fromisoformat(d) for d in frame["date"]]
+    return frame
+
+
+def _migrate(tmp_path, monkeypatch, source) -> None:
+    path = tmp_path / "migrated.db"
+    shutil.copyfile(source, path)
+    db.close_all()
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.init_db()
+
+
+def _assert_round_trip(expected: pd.DataFrame) -> None:
+    loaded = db.load_all()
+    assert list(loaded.columns) == list(db.COLUMNS)
+    pd.testing.assert_frame_equal(
+        loaded.astype(object).where(loaded.notna(), None),
+        expected[list(db.COLUMNS)].astype(object).where(expected.notna(), None),
+        check_dtype=False,
+    )
+
+
+def test_migrates_the_baseline_database(db_path, tmp_path, monkeypatch):
+    expected = _baseline_rows(BASELINE_DB)
+    assert len(expected) > 0
+    _migrate(tmp_path, monkeypatch, BASELINE_DB)
+
+    assert db.schema_version() == db.MIGRATIONS[-1][0]
+    assert db.list_journals() == [(db.DEFAULT_JOURNAL_ID, db.DEFAULT_JOURNAL_NAME)]
+    _assert_round_trip(expected)
+    _assert_rollups_match()
+    with db.get_conn(readonly=True) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM journal WHERE row_hash IS NULL").fetchone() == (0,)
+
+    first = expected.iloc[0]
+    entry = db.load_entry(first["date"])
+    assert entry["wake_time"] == time.fromisoformat(first["wake_time"])
+    db.upsert_entry({**entry, "weight": 70.0})
+    assert db.load_entry(first["date"])["weight"] == 70.0
+
+
+def test_migrates_baseline_edge_values(db_path, tmp_path, monkeypatch):
+    source = tmp_path / "baseline.db"
+    with _read_only(BASELINE_DB) as conn:
+        (create,) = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'journal'").fetchone()
+    with sqlite3.connect(source) as conn:
+        conn.execute(create)
+        conn.executemany(
+            "INSERT INTO journal VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                ("1969-12-31", "Mercredi", None, 1.5, 2, 0.0, 0.0, 0.0, 0.0, 0, None,
+                 "07:05", None, 7.5, 1, 5.2, None),
+                ("2024-02-29", "Jeudi", 0.5, 2.0, 0, 1.0, 4.0, 12.5, 0.3, 1, "Fête",
+                 "00:00", "23:59", 6.0, 0, 0.0, 74.3),
+            ],
+        )
+    expected = _baseline_rows(source)
+    _migrate(tmp_path, monkeypatch, source)
+
+    _assert_round_trip(expected)
+    _assert_rollups_match()
+    assert db.load_entry(date(1969, 12, 31))["sleep_time"] is None
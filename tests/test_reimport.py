@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from datetime import date
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.db as db
+from benchmarks.generator import excel_frame, journal_frame
+from core.import_export import import_csv_to_db
+
+
+def _row(**values) -> tuple:
+    """A storage tuple for 2000-01-01 with ``values`` over zero/empty defaults."""
+    text = db.STORAGE_TEXT_COLUMNS
+    defaults = {c: "x" if c in text else 0.0 for c in db.STORAGE_COLUMNS}
+    defaults["day"] = db._to_day(date(2000, 1, 1))
+    defaults.update(values)
+    return tuple(defaults[c] for c in db.STORAGE_COLUMNS)
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        (_row(coffee=2), _row(coffee=2.0)),
+        (_row(coffee=1), _row(coffee=True)),
+        (_row(weight=74.5), _row(weight=np.float64(74.5))),
+        (_row(weight=0.0), _row(weight=-0.0)),
+        (_row(weight=None), _row(weight=float("nan"))),
+        (_row(soiree_name=None), _row(soiree_name=float("nan"))),
+        (_row(water_l=float("2.50")), _row(water_l=float("2.5"))),
+        (_row(day=0), _row(day=1)),  # the day is the key, not content
+    ],
+)
+def test_row_hash_equal_values(a, b):
+    assert db._row_hashes([a]).tolist() == db._row_hashes([b]).tolist()
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        (_row(weight=None), _row(weight=0.0)),
+        (_row(soiree_name=None), _row(soiree_name="None")),
+        (_row(soiree_name=None), _row(soiree_name="nan")),
+        (_row(soiree_name=None), _row(soiree_name="")),
+        (_row(weight=0.1 + 0.2), _row(weight=0.3)),
+        (_row(weight=1.0), _row(nico=1.0)),  # same value, other column
+        (_row(wake_min=None), _row(wake_min=0)),
+    ],
+)
+def test_row_hash_distinct_values(a, b):
+    assert db._row_hashes([a]).tolist() != db._row_hashes([b]).tolist()
+
+
+def _nulls_as_none(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), None)
+
+
+def _csv(frame: pd.DataFrame, **options) -> io.BytesIO:
+    return io.BytesIO(frame.to_csv(index=False, **options).encode("utf-8"))
+
+
+def test_reimport_counts_and_dry_run(db_path):
+    source = excel_frame(300)
+    assert import_csv_to_db(_csv(source, sep=";", decimal=",")) == {
+        "rows": 300, "inserted": 300, "updated": 0, "unchanged": 0
+    }
+    # Same values written differently: other separator and decimal mark,
+    # fixed-width floats and integers spelled as floats.
+    reformatted = source.astype({"T_coffee": float})
+    again = import_csv_to_db(_csv(reformatted, sep=",", float_format="%.4f"))
+    assert again == {"rows": 300, "inserted": 0, "updated": 0, "unchanged": 300}
+
+    grown = pd.concat([source, excel_frame(320).iloc[300:]], ignore_index=True)
+    grown.loc[3, "V_poids"] = 99.9
+    grown.loc[4, "V_poids"] = np.nan
+    grown.loc[5, "N_soiree"] = "Anniversaire"
+    version = db.data_version()
+
+    report = import_csv_to_db(_csv(grown, sep=";", decimal=","), 100, dry_run=True)
+    assert db.data_version() == version  # nothing written
+    assert {k: report[k] for k in ("rows", "inserted", "updated", "unchanged")} == {
+        "rows": 320, "inserted": 20, "updated": 3, "unchanged": 297
+    }
+    days = [d.date() for d in pd.to_datetime(grown["Temps"], dayfirst=True)]
+    assert report["new_dates"] == days[300:]
+    old = db.load_all().set_index("date")
+    expected = pd.DataFrame(
+        [
+            (days[3], "weight", old.loc[days[3], "weight"], 99.9),
+            (days[4], "weight", old.loc[days[4], "weight"], None),
+            (days[5], "soiree_name", old.loc[days[5], "soiree_name"], "Anniversaire"),
+        ],
+        columns=["date", "column", "old", "new"],
+    )
+    pd.testing.assert_frame_equal(_nulls_as_none(report["changes"]), _nulls_as_none(expected))
+
+    assert import_csv_to_db(_csv(grown, sep=";", decimal=","), 100) == {
+        "rows": 320, "inserted": 20, "updated": 3, "unchanged": 297
+    }
+    assert db.load_entry(days[4])["weight"] is None
+
+
+def test_reimport_leaves_unchanged_archived_years_archived(db_path):
+    frame = journal_frame(730, start=date(2020, 1, 1))
+    db.upsert_many(frame)
+    db.compact_archive(2021)
+
+    assert db.upsert_many(frame) == {"inserted": 0, "updated": 0, "unchanged": 730}
+    with db.get_conn(readonly=True) as conn:
+        assert conn.execute("SELECT year FROM journal_archive").fetchall() == [(2020,)]
+
+    frame.loc[10, "weight"] = 123.0
+    report = db.diff_rows(frame)
+    assert (report["updated"], report["unchanged"]) == (1, 729)
+    assert report["changes"][["column", "new"]].values.tolist() == [["weight", 123.0]]
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+import core.db as db
+from benchmarks.generator import journal_frame
+
+# Bucket labels of pandas resampling that match the SQL buckets: weeks start
+# on Monday, months on the 1st.
+RESAMPLE_RULES = {"week": "W-MON", "month": "MS"}
+
+
+def _expected(granularity: str, journal: pd.DataFrame) -> pd.DataFrame:
+    """The rollup table as a pandas resample of ``journal`` would compute it."""
+    frame = journal.set_index(pd.to_datetime(journal["date"].astype(str)))
+    buckets = frame[list(db.METRIC_COLUMNS)].astype(float).resample(
+        RESAMPLE_RULES[granularity], closed="left", label="left"
+    )
+    parts = {"days": buckets.size()}
+    for metric in db.METRIC_COLUMNS:
+        parts[f"{metric}_sum"] = buckets[metric].sum(min_count=1)
+        parts[f"{metric}_avg"] = buckets[metric].mean()
+        parts[f"{metric}_count"] = buckets[metric].count()
+    out = pd.DataFrame(parts)
+    out = out[out["days"] > 0]
+    out.index = pd.Index(out.index.date, name="bucket")
+    return out.astype(float)
+
+
+def _stored(granularity: str, journal_id: int = db.DEFAULT_JOURNAL_ID) -> pd.DataFrame:
+    table = db.ROLLUPS[granularity][0]
+    with db.get_conn(readonly=True) as conn:
+        out = pd.read_sql_query(
+            f"SELECT * FROM {table} WHERE journal_id = ? ORDER BY bucket", conn, params=[journal_id]
+        )
+    out.index = pd.Index([db._from_day(b) for b in out.pop("bucket")], name="bucket")
+    return out.drop(columns="journal_id").astype(float)
+
+
+def _assert_rollups_match(journal_id: int = db.DEFAULT_JOURNAL_ID) -> None:
+    journal = db.load_all(journal_id)
+    for granularity in db.ROLLUPS:
+        expected = _expected(granularity, journal)
+        pd.testing.assert_frame_equal(_stored(granularity, journal_id), expected, rtol=1e-9)
+
+
+def _edit(d: date, **values) -> None:
+    db.upsert_entry({**db.load_entry(d), **values})
+
+
+def test_rollups_follow_inserts_and_edits(db_path):
+    # Starts before 1970 so negative day numbers are bucketed too.
+    db.upsert_many(journal_frame(500, start=date(1969, 6, 1)))
+    _assert_rollups_match()
+
+    _edit(date(1969, 12, 31), weight=None, coffee=5)
+    _edit(date(1970, 1, 1), weight=88.5)  # a Thursday: its week started in 1969
+    db.upsert_many(journal_frame(40, start=date(1970, 9, 20), seed=3))
+    _assert_rollups_match()
+
+    other = db.journal_id_for("other")
+    db.upsert_many(journal_frame(30, start=date(1970, 1, 1), seed=4), journal_id=other)
+    _assert_rollups_match()
+    _assert_rollups_match(other)
+
+
+def test_rollups_survive_compaction_and_restore(db_path):
+    db.upsert_many(journal_frame(3 * 365, start=date(2019, 1, 1)))
+    db.compact_archive(2021)
+    _assert_rollups_match()
+
+    # 2021-01-01 is a Friday whose week started on 2020-12-28: the edit must
+    # restore 2020 so the week is recomputed from every one of its rows.
+    _edit(date(2021, 1, 1), weight=90.0)
+    with db.get_conn(readonly=True) as conn:
+        years = [y for (y,) in conn.execute("SELECT year FROM journal_archive ORDER BY year")]
+    assert years == [2019]
+    _assert_rollups_match()
+
+    _edit(date(2019, 3, 5), run_km=None, nico=1.0)
+    db.compact_archive(2022)
+    _assert_rollups_match()
+
+
+@pytest.mark.parametrize("granularity", list(db.ROLLUPS))
+def test_load_rollup_reads_default_aggregates(db_path, granularity):
+    db.upsert_many(journal_frame(200, start=date(2020, 1, 1)))
+    start, end = date(2020, 2, 12), date(2020, 5, 3)
+    frame = db.load_rollup(granularity, start, end, ["weight", "run_km"])
+
+    expected = _expected(granularity, db.load_all())
+    bucket_of_start = expected.index[expected.index <= start][-1]
+    expected = expected[(expected.index >= bucket_of_start) & (expected.index <= end)]
+    assert frame["date"].tolist() == expected.index.tolist()
+    assert frame["weight"].tolist() == pytest.approx(expected["weight_avg"].tolist(), nan_ok=True)
+    assert frame["run_km"].tolist() == pytest.approx(expected["run_km_sum"].tolist())
+    assert frame["date"].iloc[0] <= start < frame["date"].iloc[0] + timedelta(days=31)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.utils import (
+    DAY_NAMES,
+    day_name_for_language,
+    day_names_for_dates,
+    float_series_to_time_str,
+    float_to_time_str,
+    hhmm_table,
+)
+
+EDGE_HOURS = [
+    0.0, -0.0, 7.25, 7.5, 23.99, 23.999, 24.0, 25.5, 48.25, -0.25, -1.5, -12.8167,
+    -23.999, -24.0, -100.75, 0.5 / 60, 1.5 / 60, 2.5 / 60, 7 + 29.5 / 60, 1e6 + 0.1,
+    1e17 + 0.5, -1e17, 1e300, float("inf"), float("-inf"), float("nan"), None,
+    "7.5", "abc", "",
+]
+
+
+def test_float_to_time_str_examples():
+    assert float_to_time_str(7.25) == "07:15"
+    assert float_to_time_str(23.999) == "00:00"
+    assert float_to_time_str(-0.25) == "23:45"
+    assert float_to_time_str(-12.8167) == "11:11"
+    assert float_to_time_str(float("inf")) is None
+    assert float_to_time_str(None) is None
+    assert float_to_time_str(pd.NA) is None
+    assert float_to_time_str("x") is None
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_series_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    values = np.concatenate(
+        [rng.uniform(-50, 50, 2000), rng.integers(-2000, 2000, 500) / 60, rng.normal(0, 1e9, 100)]
+    )
+    series = pd.Series([*values.tolist(), *EDGE_HOURS], dtype=object)
+    expected = [float_to_time_str(v) for v in series]
+    assert float_series_to_time_str(series).tolist() == expected
+
+
+def test_series_keeps_index():
+    series = pd.Series([7.5, None], index=[10, 20])
+    result = float_series_to_time_str(series)
+    assert result.index.tolist() == [10, 20]
+    assert result.tolist() == ["07:30", None]
+
+
+def test_hhmm_table_matches_formatting():
+    table = hhmm_table()
+    assert len(table) == 1440
+    assert table.tolist() == [f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)]
+
+
+@pytest.mark.parametrize("language", [*DAY_NAMES, "xx"])
+def test_day_names_match_scalar(language):
+    days = [date(1999, 12, 25) + timedelta(days=i) for i in range(30)]
+    for dates in (pd.Series(days), pd.Series(pd.to_datetime(days)), pd.Series([d.isoformat() for d in days])):
+        expected = [day_name_for_language(d, language) for d in days]
+        assert day_names_for_dates(dates, language).tolist() == expected
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from datetime import date
+import sqlite3
+import threading
+
+import pytest
+
+import core.db as db
+from benchmarks.generator import journal_frame
+from core import writer
+
+
+def _params(rows: int, start: date = date(2020, 1, 1), seed: int = 0) -> list[tuple]:
+    return db._storage_params(journal_frame(rows, start=start, seed=seed))
+
+
+def _queue_together(monkeypatch, *writes):
+    """Queue ``writes`` before the writer starts so they form one group."""
+    writer.stop()
+    with monkeypatch.context() as m:
+        m.setattr(writer, "_ensure_started", lambda: None)
+        futures = [writer.submit_rows(params, journal_id) for params, journal_id in writes]
+    writer._ensure_started()
+    return futures
+
+
+def test_failed_write_only_fails_its_own_future(db_path, monkeypatch):
+    bad_journal = db.journal_id_for("bad")
+    write_rows = writer._write_rows
+
+    def fail_after_writing(conn, journal_id, params, version, batch_size):
+        result = write_rows(conn, journal_id, params, version, batch_size)
+        if journal_id == bad_journal:
+            raise RuntimeError("boom")
+        return result
+
+    monkeypatch.setattr(writer, "_write_rows", fail_after_writing)
+    groups = writer.writer_stats()["groups"]
+    good, bad, later = _queue_together(
+        monkeypatch,
+        (_params(3), db.DEFAULT_JOURNAL_ID),
+        (_params(5), bad_journal),
+        (_params(2, start=date(2021, 1, 1)), db.DEFAULT_JOURNAL_ID),
+    )
+
+    assert good.result(timeout=10) == {"inserted": 3, "updated": 0, "unchanged": 0}
+    assert later.result(timeout=10)["inserted"] == 2
+    with pytest.raises(RuntimeError, match="boom"):
+        bad.result(timeout=10)
+    assert writer.writer_stats()["groups"] == groups + 1
+    # The failed write's rows were rolled back to its savepoint.
+    assert db.load_all(bad_journal).empty
+    assert len(db.load_all()) == 5
+    with db.get_conn(readonly=True) as conn:
+        assert conn.execute(
+            "SELECT COUNT(*) FROM journal_weekly WHERE journal_id = ?", (bad_journal,)
+        ).fetchone() == (0,)
+
+
+def test_locked_database_is_retried_with_backoff(db_path, monkeypatch):
+    monkeypatch.setattr(writer, "WRITE_BACKOFF_S", 0.01)
+    monkeypatch.setattr(db, "BUSY_TIMEOUT_MS", 0)
+    db.close_all()
+    sleeps = []
+    sleep = writer.time.sleep
+    monkeypatch.setattr(writer.time, "sleep", lambda s: (sleeps.append(s), sleep(s)))
+
+    # Another process holds the write lock for a while.
+    other = sqlite3.connect(db_path, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    release = threading.Timer(0.1, other.rollback)
+    release.start()
+    try:
+        retries = writer.writer_stats()["retries"]
+        future = writer.submit_rows(_params(4))
+        assert future.result(timeout=10)["inserted"] == 4
+    finally:
+        release.join()
+        other.close()
+
+    assert len(sleeps) >= 2
+    assert writer.writer_stats()["retries"] - retries == len(sleeps)
+    assert sleeps == [
+        min(writer.WRITE_BACKOFF_S * 2**n, writer.WRITE_BACKOFF_MAX_S) for n in range(len(sleeps))
+    ]
+    assert len(db.load_all()) == 4
+
+
+def test_locked_database_fails_after_the_last_retry(db_path, monkeypatch):
+    monkeypatch.setattr(writer, "WRITE_RETRIES", 2)
+    monkeypatch.setattr(writer, "WRITE_BACKOFF_S", 0.0)
+    monkeypatch.setattr(db, "BUSY_TIMEOUT_MS", 0)
+    db.close_all()
+    other = sqlite3.connect(db_path)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        futures = _queue_together(
+            monkeypatch, (_params(1), db.DEFAULT_JOURNAL_ID), (_params(1, seed=1), 1)
+        )
+        for future in futures:
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                future.result(timeout=10)
+    finally:
+        other.rollback()
+        other.close()
+    assert db.load_all().empty
+
+
+def test_cancelled_write_is_skipped(db_path, monkeypatch):
+    writer.stop()
+    with monkeypatch.context() as m:
+        m.setattr(writer, "_ensure_started", lambda: None)
+        cancelled = writer.submit_rows(_params(3))
+        kept = writer.submit_rows(_params(2, start=date(2021, 1, 1)))
+        assert cancelled.cancel()
+    writer._ensure_started()
+
+    assert kept.result(timeout=10)["inserted"] == 2
+    assert cancelled.cancelled()
+    assert [d.year for d in db.load_all()["date"]] == [2021, 2021]
+
+
+def test_writer_restarts_after_stop(db_path):
+    first = writer.submit_rows(_params(2))
+    writer.stop()
+    assert first.done() and first.result()["inserted"] == 2
+    assert writer._THREAD is None
+
+    second = writer.submit_rows(_params(2, start=date(2022, 1, 1)))
+    assert second.result(timeout=10)["inserted"] == 2
+    assert writer._THREAD is not None and writer._THREAD.is_alive()
+    assert len(db.load_all()) == 4
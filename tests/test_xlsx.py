@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import date
+import io
+
+import pandas as pd
+import pytest
+
+import core.db as db
+import core.import_export as ie
+from benchmarks.generator import excel_frame, write_excel_xlsx
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    return write_excel_xlsx(tmp_path / "journal.xlsx", 45)
+
+
+def test_read_xlsx_streams_mapped_chunks(workbook):
+    total, chunks = ie.read_xlsx(workbook, chunksize=20)
+    chunks = list(chunks)
+    assert total in (None, 46)  # the declared dimension, header included
+    assert [len(c) for c in chunks] == [20, 20, 5]
+
+    frame = pd.concat(chunks, ignore_index=True)
+    assert set(frame.columns) <= set(ie.COL_MAP.values())
+    assert frame["date"].iloc[0] == date(2000, 1, 1)
+    assert frame["wake_time"].str.fullmatch(r"\d\d:\d\d").all()
+    source = excel_frame(45)
+    assert frame["weight"].tolist() == pytest.approx(source["V_poids"].tolist(), nan_ok=True)
+
+
+def test_read_xlsx_whole_sheet_and_missing_sheet(workbook):
+    _, chunks = ie.read_xlsx(workbook)
+    assert [len(c) for c in chunks] == [45]
+    with pytest.raises(ValueError, match="Nope"):
+        ie.read_xlsx(workbook, sheet="Nope")
+
+
+def test_workbook_imports_like_its_csv(db_path, workbook):
+    csv = excel_frame(45).to_csv(sep=";", decimal=",", index=False).encode()
+    ie.import_csv_to_db(io.BytesIO(csv))
+    copy = db.journal_id_for("copy")
+    assert ie.import_csv_to_db(workbook, chunksize=10, journal_id=copy)["inserted"] == 45
+    pd.testing.assert_frame_equal(db.load_all(copy), db.load_all())
+
+
+def test_workbook_in_multi_file_import_is_normalised_by_chunk(db_path, workbook, monkeypatch):
+    monkeypatch.setattr(ie, "IMPORT_CHUNK_ROWS", 10)
+    sizes = []
+    normalise = ie.normalise_frame
+
+    def recording(chunk):
+        sizes.append(len(chunk))
+        return normalise(chunk)
+
+    monkeypatch.setattr(ie, "normalise_frame", recording)
+
+    assert ie.import_csv_to_db([workbook], workers=1)["inserted"] == 45
+    assert sizes == [10, 10, 10, 10, 5]